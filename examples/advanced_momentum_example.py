@@ -9,6 +9,9 @@ with various parameter configurations and asset universes.
 
 import sys
 import os
+import itertools
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import logging
 
@@ -18,150 +21,131 @@ sys.path.insert(0, src_path)
 
 from strategy.advanced_momentum_rotation import AdvancedBacktestRunner
 
+# Failures an individual backtest can run into; anything else is a bug and propagates
+BACKTEST_ERRORS = (sqlite3.Error, ValueError, KeyError)
 
-def example_1_basic_usage():
-    """Example 1: Basic usage with default parameters."""
+
+# Single-backtest examples: each entry differs only in universe and parameters
+EXAMPLES = [
+    {
+        'name': 'Example 1',
+        'title': 'Basic Momentum Rotation Strategy',
+        # Basic asset universe (equity-focused)
+        'symbols': ['510300', '518880', '513100', '159561', '513520'],
+        'params': {
+            'lookback_period': 20,        # 20-day momentum
+            'top_n_holdings': 3,          # Hold top 3 assets
+            'position_size': 0.95,        # 95% invested
+            'rebalance_freq': 'weekly',   # Weekly rebalancing
+            'max_position_size': 0.4,     # Max 40% per position
+            'transaction_cost': 0.001,    # 0.1% transaction cost
+        },
+        'report_dir': 'results/example_1',
+    },
+    {
+        'name': 'Example 2',
+        'title': 'Conservative Multi-Asset Strategy',
+        # Conservative asset universe (bonds, gold, defensive equities)
+        'symbols': ['511580', '511130', '518880', '161226', '510300'],
+        'params': {
+            'lookback_period': 60,        # Longer momentum period
+            'top_n_holdings': 4,          # Hold top 4 assets
+            'position_size': 0.80,        # 80% invested (20% cash buffer)
+            'rebalance_freq': 'monthly',  # Monthly rebalancing
+            'max_position_size': 0.25,    # Max 25% per position
+            'stop_loss_pct': -0.05,       # 5% stop loss
+            'trailing_stop_pct': 0.03,    # 3% trailing stop
+            'transaction_cost': 0.001,
+            'min_momentum_threshold': -0.05,  # Allow negative momentum up to -5%
+        },
+        'report_dir': 'results/example_2',
+    },
+    {
+        'name': 'Example 3',
+        'title': 'Aggressive Global Multi-Asset Strategy',
+        # Aggressive asset universe (commodities, international equities)
+        'symbols': ['159985', '159980', '161129', '162411', '513100'],
+        'params': {
+            'lookback_period': 10,        # Short momentum period
+            'top_n_holdings': 2,          # Concentrated holdings
+            'position_size': 0.98,        # 98% invested
+            'rebalance_freq': 'daily',    # Daily rebalancing
+            'max_position_size': 0.50,    # Max 50% per position
+            'stop_loss_pct': -0.15,       # 15% stop loss
+            'trailing_stop_pct': 0.08,    # 8% trailing stop
+            'transaction_cost': 0.002,    # Higher transaction cost for frequent trading
+            'min_momentum_threshold': 0.01,  # Only positive momentum assets
+        },
+        'report_dir': 'results/example_3',
+    },
+]
+
+
+def run_example(runner: AdvancedBacktestRunner, example: dict):
+    """Run one single-backtest example from the EXAMPLES table."""
     print("\n" + "="*60)
-    print("Example 1: Basic Momentum Rotation Strategy")
+    print(f"{example['name']}: {example['title']}")
     print("="*60)
     
-    runner = AdvancedBacktestRunner()
-    
-    # Basic strategy parameters
-    strategy_params = {
-        'lookback_period': 20,        # 20-day momentum
-        'top_n_holdings': 3,          # Hold top 3 assets
-        'position_size': 0.95,        # 95% invested
-        'rebalance_freq': 'weekly',   # Weekly rebalancing
-        'max_position_size': 0.4,     # Max 40% per position
-        'transaction_cost': 0.001,    # 0.1% transaction cost
-    }
-    
-    # Basic asset universe (equity-focused)
-    symbols = ['510300', '518880', '513100', '159561', '513520']
-    
     try:
         results = runner.run_backtest(
-            symbols=symbols,
+            symbols=example['symbols'],
             start_date='2020-01-01',
             end_date='2024-12-31',
-            strategy_params=strategy_params,
+            strategy_params=example['params'],
             initial_capital=1000000.0
         )
+        strategy_results = results['strategy_results']
         
         print(f"Final Portfolio Value: ${results['final_value']:,.2f}")
         print(f"Total Return: {results['total_return']:.2%}")
-        print(f"Sharpe Ratio: {results['strategy_results']['sharpe_ratio']:.2f}")
+        print(f"Sharpe Ratio: {strategy_results['sharpe_ratio']:.2f}")
+        print(f"Max Drawdown: {strategy_results['max_drawdown']:.2%}")
+        print(f"Volatility: {strategy_results['volatility']:.2%}")
         
         # Generate detailed report
-        runner.generate_performance_report(results, "results/example_1")
+        runner.generate_performance_report(results, example['report_dir'])
         
-    except Exception as e:
-        print(f"Example 1 failed: {e}")
-    finally:
-        runner._close_db()
+    except BACKTEST_ERRORS as e:
+        print(f"{example['name']} failed: {e}")
 
 
-def example_2_conservative_strategy():
-    """Example 2: Conservative strategy with bonds and defensive assets."""
-    print("\n" + "="*60)
-    print("Example 2: Conservative Multi-Asset Strategy")
-    print("="*60)
-    
-    runner = AdvancedBacktestRunner()
-    
-    # Conservative strategy parameters
-    strategy_params = {
-        'lookback_period': 60,        # Longer momentum period
-        'top_n_holdings': 4,          # Hold top 4 assets
-        'position_size': 0.80,        # 80% invested (20% cash buffer)
-        'rebalance_freq': 'monthly',  # Monthly rebalancing
-        'max_position_size': 0.25,    # Max 25% per position
-        'stop_loss_pct': -0.05,       # 5% stop loss
-        'trailing_stop_pct': 0.03,    # 3% trailing stop
-        'transaction_cost': 0.001,
-        'min_momentum_threshold': -0.05,  # Allow negative momentum up to -5%
-    }
-    
-    # Conservative asset universe (bonds, gold, defensive equities)
-    symbols = ['511580', '511130', '518880', '161226', '510300']
-    
-    try:
-        results = runner.run_backtest(
-            symbols=symbols,
-            start_date='2020-01-01',
-            end_date='2024-12-31',
-            strategy_params=strategy_params,
-            initial_capital=1000000.0
-        )
-        
-        print(f"Final Portfolio Value: ${results['final_value']:,.2f}")
-        print(f"Total Return: {results['total_return']:.2%}")
-        print(f"Max Drawdown: {results['strategy_results']['max_drawdown']:.2%}")
-        print(f"Volatility: {results['strategy_results']['volatility']:.2%}")
-        
-        runner.generate_performance_report(results, "results/example_2")
-        
-    except Exception as e:
-        print(f"Example 2 failed: {e}")
-    finally:
-        runner._close_db()
+# Per-process runner for the parameter sweep workers; each worker loads the
+# price data once and reuses it for every combination it is handed.
+_worker_runner = None
 
 
-def example_3_aggressive_strategy():
-    """Example 3: Aggressive strategy with commodities and international exposure."""
-    print("\n" + "="*60)
-    print("Example 3: Aggressive Global Multi-Asset Strategy")
-    print("="*60)
-    
-    runner = AdvancedBacktestRunner()
-    
-    # Aggressive strategy parameters
-    strategy_params = {
-        'lookback_period': 10,        # Short momentum period
-        'top_n_holdings': 2,          # Concentrated holdings
-        'position_size': 0.98,        # 98% invested
-        'rebalance_freq': 'daily',    # Daily rebalancing
-        'max_position_size': 0.50,    # Max 50% per position
-        'stop_loss_pct': -0.15,       # 15% stop loss
-        'trailing_stop_pct': 0.08,    # 8% trailing stop
-        'transaction_cost': 0.002,    # Higher transaction cost for frequent trading
-        'min_momentum_threshold': 0.01,  # Only positive momentum assets
-    }
-    
-    # Aggressive asset universe (commodities, international equities)
-    symbols = ['159985', '159980', '161129', '162411', '513100']
-    
-    try:
-        results = runner.run_backtest(
-            symbols=symbols,
-            start_date='2020-01-01',
-            end_date='2024-12-31',
-            strategy_params=strategy_params,
-            initial_capital=1000000.0
-        )
-        
-        print(f"Final Portfolio Value: ${results['final_value']:,.2f}")
-        print(f"Total Return: {results['total_return']:.2%}")
-        print(f"Sharpe Ratio: {results['strategy_results']['sharpe_ratio']:.2f}")
-        print(f"Max Drawdown: {results['strategy_results']['max_drawdown']:.2%}")
-        
-        runner.generate_performance_report(results, "results/example_3")
-        
-    except Exception as e:
-        print(f"Example 3 failed: {e}")
-    finally:
-        runner._close_db()
+def _init_worker():
+    """Create the backtest runner owned by a sweep worker process."""
+    global _worker_runner
+    _worker_runner = AdvancedBacktestRunner()
+
 
+def _run_one(symbols, strategy_params):
+    """Run a single optimization backtest inside a worker process.
 
-def example_4_parameter_optimization():
+    Returns:
+        Tuple of (sharpe_ratio, total_return, max_drawdown)
+    """
+    results = _worker_runner.run_backtest(
+        symbols=symbols,
+        start_date='2020-01-01',
+        end_date='2023-12-31',  # Shorter period for optimization
+        strategy_params=strategy_params,
+        initial_capital=1000000.0
+    )
+    strategy_results = results['strategy_results']
+    return (strategy_results['sharpe_ratio'],
+            results['total_return'],
+            strategy_results['max_drawdown'])
+
+
+def example_4_parameter_optimization(runner: AdvancedBacktestRunner):
     """Example 4: Parameter optimization across different configurations."""
     print("\n" + "="*60)
     print("Example 4: Parameter Optimization")
     print("="*60)
     
-    runner = AdvancedBacktestRunner()
-    
     # Asset universe for optimization
     symbols = ['510300', '518880', '513100', '511580', '159985']
     
@@ -169,74 +153,69 @@ def example_4_parameter_optimization():
     lookback_periods = [10, 20, 40, 60]
     top_n_values = [2, 3, 4]
     rebalance_frequencies = ['weekly', 'monthly']
+    param_grid = list(itertools.product(lookback_periods, top_n_values, rebalance_frequencies))
     
-    best_result = None
+    best_params = None
     best_sharpe = -float('inf')
     
     print("Testing parameter combinations...")
     
-    for lookback in lookback_periods:
-        for top_n in top_n_values:
-            for rebalance_freq in rebalance_frequencies:
-                
-                strategy_params = {
-                    'lookback_period': lookback,
-                    'top_n_holdings': top_n,
-                    'position_size': 0.90,
-                    'rebalance_freq': rebalance_freq,
-                    'max_position_size': 0.35,
-                    'transaction_cost': 0.001,
-                }
+    # Every combination is an independent backtest, so fan them out across cores
+    with ProcessPoolExecutor(max_workers=min(len(param_grid), os.cpu_count() or 1),
+                             initializer=_init_worker) as executor:
+        futures = []
+        for lookback, top_n, rebalance_freq in param_grid:
+            strategy_params = {
+                'lookback_period': lookback,
+                'top_n_holdings': top_n,
+                'position_size': 0.90,
+                'rebalance_freq': rebalance_freq,
+                'max_position_size': 0.35,
+                'transaction_cost': 0.001,
+            }
+            futures.append((strategy_params, executor.submit(_run_one, symbols, strategy_params)))
+        
+        for (lookback, top_n, rebalance_freq), (strategy_params, future) in zip(param_grid, futures):
+            try:
+                sharpe_ratio, total_return, max_drawdown = future.result()
                 
-                try:
-                    results = runner.run_backtest(
-                        symbols=symbols,
-                        start_date='2020-01-01',
-                        end_date='2023-12-31',  # Shorter period for optimization
-                        strategy_params=strategy_params,
-                        initial_capital=1000000.0
-                    )
-                    
-                    sharpe_ratio = results['strategy_results']['sharpe_ratio']
-                    total_return = results['total_return']
-                    max_drawdown = results['strategy_results']['max_drawdown']
-                    
-                    print(f"Lookback: {lookback:2d}, Top N: {top_n}, Freq: {rebalance_freq:7s} "
-                          f"| Sharpe: {sharpe_ratio:5.2f}, Return: {total_return:6.2%}, "
-                          f"Drawdown: {max_drawdown:6.2%}")
-                    
-                    if sharpe_ratio > best_sharpe:
-                        best_sharpe = sharpe_ratio
-                        best_result = {
-                            'params': strategy_params.copy(),
-                            'results': results
-                        }
+                print(f"Lookback: {lookback:2d}, Top N: {top_n}, Freq: {rebalance_freq:7s} "
+                      f"| Sharpe: {sharpe_ratio:5.2f}, Return: {total_return:6.2%}, "
+                      f"Drawdown: {max_drawdown:6.2%}")
                 
-                except Exception as e:
-                    print(f"Failed for lookback={lookback}, top_n={top_n}, freq={rebalance_freq}: {e}")
+                if sharpe_ratio > best_sharpe:
+                    best_sharpe = sharpe_ratio
+                    best_params = strategy_params
+            
+            except BACKTEST_ERRORS as e:
+                print(f"Failed for lookback={lookback}, top_n={top_n}, freq={rebalance_freq}: {e}")
     
-    if best_result:
+    if best_params:
         print(f"\nBest Parameters (Sharpe Ratio: {best_sharpe:.2f}):")
-        for key, value in best_result['params'].items():
+        for key, value in best_params.items():
             print(f"  {key}: {value}")
         
-        # Generate report for best parameters
-        runner.generate_performance_report(best_result['results'], "results/example_4_best")
-    
-    runner._close_db()
+        # Re-run the winner locally to generate its report
+        best_results = runner.run_backtest(
+            symbols=symbols,
+            start_date='2020-01-01',
+            end_date='2023-12-31',
+            strategy_params=dict(best_params),
+            initial_capital=1000000.0
+        )
+        runner.generate_performance_report(best_results, "results/example_4_best")
 
 
-def example_5_custom_asset_universe():
+def example_5_custom_asset_universe(runner: AdvancedBacktestRunner):
     """Example 5: Custom asset universe selection."""
     print("\n" + "="*60)
     print("Example 5: Custom Asset Universe Analysis")
     print("="*60)
     
-    runner = AdvancedBacktestRunner()
-    
     # Get all available symbols
     available_symbols = runner.get_available_symbols()
     print(f"Available symbols in database: {available_symbols}")
+    available_set = frozenset(available_symbols)
     
     # Define different asset universes for comparison
     asset_universes = {
@@ -260,38 +239,43 @@ def example_5_custom_asset_universe():
     
     results_comparison = {}
     
+    # Filter symbols that exist in database
+    runnable_universes = {}
     for universe_name, symbols in asset_universes.items():
-        # Filter symbols that exist in database
-        available_symbols_in_universe = [s for s in symbols if s in available_symbols]
+        available_symbols_in_universe = [s for s in symbols if s in available_set]
         
         if len(available_symbols_in_universe) < 2:
             print(f"Skipping {universe_name}: insufficient symbols")
             continue
         
-        print(f"\nTesting {universe_name}: {available_symbols_in_universe}")
+        runnable_universes[universe_name] = available_symbols_in_universe
+    
+    # All universes share prices and momentum computed once on their union
+    try:
+        universe_results = runner.run_universe_backtests(
+            runnable_universes,
+            start_date='2020-01-01',
+            end_date='2024-12-31',
+            strategy_params=strategy_params,
+            initial_capital=1000000.0
+        )
+    except BACKTEST_ERRORS as e:
+        print(f"  Failed: {e}")
+        universe_results = {}
+    
+    for universe_name, results in universe_results.items():
+        print(f"\nTesting {universe_name}: {runnable_universes[universe_name]}")
+        
+        results_comparison[universe_name] = {
+            'total_return': results['total_return'],
+            'sharpe_ratio': results['strategy_results']['sharpe_ratio'],
+            'max_drawdown': results['strategy_results']['max_drawdown'],
+            'volatility': results['strategy_results']['volatility']
+        }
         
-        try:
-            results = runner.run_backtest(
-                symbols=available_symbols_in_universe,
-                start_date='2020-01-01',
-                end_date='2024-12-31',
-                strategy_params=strategy_params,
-                initial_capital=1000000.0
-            )
-            
-            results_comparison[universe_name] = {
-                'total_return': results['total_return'],
-                'sharpe_ratio': results['strategy_results']['sharpe_ratio'],
-                'max_drawdown': results['strategy_results']['max_drawdown'],
-                'volatility': results['strategy_results']['volatility']
-            }
-            
-            print(f"  Total Return: {results['total_return']:.2%}")
-            print(f"  Sharpe Ratio: {results['strategy_results']['sharpe_ratio']:.2f}")
-            print(f"  Max Drawdown: {results['strategy_results']['max_drawdown']:.2%}")
-            
-        except Exception as e:
-            print(f"  Failed: {e}")
+        print(f"  Total Return: {results['total_return']:.2%}")
+        print(f"  Sharpe Ratio: {results['strategy_results']['sharpe_ratio']:.2f}")
+        print(f"  Max Drawdown: {results['strategy_results']['max_drawdown']:.2%}")
     
     # Summary comparison
     if results_comparison:
@@ -302,8 +286,31 @@ def example_5_custom_asset_universe():
             print(f"{universe:<15} {metrics['total_return']:>7.2%} "
                   f"{metrics['sharpe_ratio']:>6.2f} {metrics['max_drawdown']:>8.2%} "
                   f"{metrics['volatility']:>9.2%}")
+
+
+def example_6_engine_agreement(runner: AdvancedBacktestRunner):
+    """Example 6: Check that the Backtrader and compiled engines agree."""
+    print("\n" + "="*60)
+    print("Example 6: Engine Agreement Check (fills at the close)")
+    print("="*60)
     
-    runner._close_db()
+    for example in EXAMPLES:
+        try:
+            check = runner.check_engine_agreement(
+                symbols=example['symbols'],
+                start_date='2020-01-01',
+                end_date='2024-12-31',
+                strategy_params=example['params'],
+                initial_capital=1000000.0
+            )
+        except BACKTEST_ERRORS as e:
+            print(f"{example['name']} failed: {e}")
+            continue
+        
+        status = "OK" if check['agree'] else "MISMATCH"
+        print(f"{example['name']}: Backtrader ${check['backtrader_value']:,.2f}, "
+              f"compiled ${check['numba_value']:,.2f} "
+              f"({check['relative_difference']:+.2%}) {status}")
 
 
 def main():
@@ -321,23 +328,26 @@ def main():
     # Create results directory
     os.makedirs("results", exist_ok=True)
     
+    # One runner (and database connection) shared by every example
+    runner = AdvancedBacktestRunner()
+    
     # Run examples
     try:
-        example_1_basic_usage()
-        example_2_conservative_strategy()
-        example_3_aggressive_strategy()
-        example_4_parameter_optimization()
-        example_5_custom_asset_universe()
+        for example in EXAMPLES:
+            run_example(runner, example)
+        example_4_parameter_optimization(runner)
+        example_5_custom_asset_universe(runner)
+        example_6_engine_agreement(runner)
         
         print("\n" + "="*60)
         print("All examples completed successfully!")
         print("Check the 'results/' directory for detailed reports and charts.")
         print("="*60)
         
-    except Exception as e:
-        print(f"Examples failed: {e}")
-        import traceback
-        traceback.print_exc()
+    except BACKTEST_ERRORS:
+        logging.exception("Examples failed")
+    finally:
+        runner._close_db()
 
 
 if __name__ == "__main__":
@@ -4,13 +4,12 @@ import os
 from pathlib import Path
 import logging
 import argparse
-import backtrader as bt
 
 src_root = str(Path(__file__).parent)
 sys.path.insert(0, src_root)
 
-from data.pipeline import DataPipeline
-from strategy.momentum_rotation import BacktestRunner
+# The data pipeline (akshare) and strategy (backtrader, matplotlib) stacks are
+# imported inside the command that needs them to keep CLI startup fast
 
 # Set up logging
 logging.basicConfig(
@@ -19,34 +18,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared across strategy commands; its connection reopens lazily after _close_db()
+_backtest_runner = None
+
+def _get_backtest_runner():
+    """Return the process-wide backtest runner, creating it on first use."""
+    global _backtest_runner
+    if _backtest_runner is None:
+        from strategy.momentum_rotation import BacktestRunner
+        _backtest_runner = BacktestRunner()
+    return _backtest_runner
+
 def run_data_pipeline(args):
     """Run data pipeline operations."""
-    pipeline = DataPipeline()
-
-    if args.data_command == 'run':
-        pipeline.update_data(args.symbol)
-    elif args.data_command == 'validate':
-        results = pipeline.validate_data(args.symbol)
-        for symbol, issues in results.items():
-            if issues:
-                logger.warning(f"Validation issues for {symbol}:")
-                for issue in issues:
-                    logger.warning(f"  - {issue}")
-            else:
-                logger.info(f"No validation issues for {symbol}")
-    elif args.data_command == 'status':
-        status = pipeline.get_status()
-        for symbol, info in status.items():
-            logger.info(f"\nStatus for {symbol}:")
-            logger.info(f"  Last update: {info['last_update']}")
-            logger.info(f"  Data points: {info['data_points']}")
-            logger.info("  Indicators:")
-            for indicator, count in info['indicators'].items():
-                logger.info(f"    - {indicator}: {count} values")
+    from data.pipeline import DataPipeline
+
+    # The database persists between runs; 'reset' wipes it explicitly
+    with DataPipeline() as pipeline:
+        if args.data_command == 'reset':
+            pipeline.reset_data()
+        elif args.data_command == 'run':
+            pipeline.update_data(args.symbol)
+        elif args.data_command == 'validate':
+            results = pipeline.validate_data(args.symbol)
+            for symbol, issues in results.items():
+                if issues:
+                    logger.warning(f"Validation issues for {symbol}:")
+                    for issue in issues:
+                        logger.warning(f"  - {issue}")
+                else:
+                    logger.info(f"No validation issues for {symbol}")
+        elif args.data_command == 'status':
+            status = pipeline.get_status()
+            for symbol, info in status.items():
+                logger.info(f"\nStatus for {symbol}:")
+                logger.info(f"  Last update: {info['last_update']}")
+                logger.info(f"  Data points: {info['data_points']}")
+                logger.info("  Indicators:")
+                for indicator, count in info['indicators'].items():
+                    logger.info(f"    - {indicator}: {count} values")
 
 def run_strategy(args):
     """Run strategy operations."""
-    runner = BacktestRunner()
+    runner = _get_backtest_runner()
 
     try:
         if args.strategy_command == 'optimize':
@@ -104,7 +118,7 @@ def main():
 
     # Data pipeline subparser
     data_parser = subparsers.add_parser('data', help='Data pipeline operations')
-    data_parser.add_argument('data_command', choices=['run', 'validate', 'status'],
+    data_parser.add_argument('data_command', choices=['run', 'validate', 'status', 'reset'],
                            help='Data pipeline command to execute')
     data_parser.add_argument('--symbol', help='Optional ETF symbol to process')
 
@@ -1,11 +1,18 @@
 #!/usr/bin/env python3
+import functools
 import json
 import os
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple, Any
 from dataclasses import dataclass
+from types import MappingProxyType
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 @dataclass
 class Paths:
@@ -30,8 +37,11 @@ class DateRange:
     end_date: str
 
 
-@dataclass
+# Per-entry records are immutable and slotted (declared by hand, as
+# dataclass(slots=True) needs Python 3.10) so they carry no __dict__
+@dataclass(frozen=True)
 class PriceType:
+    __slots__ = ('description',)
     description: str
 
 
@@ -43,8 +53,7 @@ class AkShareConfig:
     column_mapping: Dict[str, str]
 
 
-@dataclass
-class ETF:
+class ETF(NamedTuple):
     name: str
     description: str
 
@@ -54,15 +63,17 @@ class TradingUniverse:
     etfs: Dict[str, ETF]
 
 
-@dataclass
+@dataclass(frozen=True)
 class DatabaseSchema:
+    __slots__ = ('columns', 'dtypes', 'constraints')
     columns: List[str]
     dtypes: Dict[str, str]
     constraints: List[str]
 
 
-@dataclass
+@dataclass(frozen=True)
 class ValidationRules:
+    __slots__ = ('required_columns', 'non_null_columns')
     required_columns: List[str]
     non_null_columns: List[str]
 
@@ -71,80 +82,143 @@ class ConfigManager:
     def __init__(self, config_path: str = "src/config.json"):
         """Initialize the configuration manager.
 
+        Loading is memoized on the file's path, modification time and size, so
+        creating several managers for an unchanged file parses it only once.
+        Instances built from the same file share their configuration objects.
+
         Args:
             config_path: Path to the configuration file
         """
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(f"Configuration file not found: {config_path}")
+
+        stat = os.stat(config_path)
+        prebuilt = self._build(os.path.abspath(config_path), stat.st_mtime_ns, stat.st_size)
+        self.__dict__.update(vars(prebuilt))
         self.config_path = config_path
-        self.config = self._load_config()
-        self._initialize_components()
+
+    @classmethod
+    @functools.lru_cache(maxsize=8)
+    def _build(cls, config_path: str, mtime_ns: int, size: int) -> 'ConfigManager':
+        """Load and initialize a manager for one version of a configuration file.
+
+        Args:
+            config_path: Absolute path to the configuration file
+            mtime_ns: File modification time, part of the cache key
+            size: File size in bytes, part of the cache key
+
+        Returns:
+            Fully initialized ConfigManager
+        """
+        manager = cls.__new__(cls)
+        manager.config_path = config_path
+        manager.config = manager._load_config()
+        manager._initialize_components()
+        return manager
 
     def _load_config(self) -> Dict:
         """Load configuration from JSON file."""
         if not os.path.exists(self.config_path):
             raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
 
-        with open(self.config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # One contiguous read; both parsers decode UTF-8 bytes themselves
+        raw = Path(self.config_path).read_bytes()
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
 
     def _initialize_components(self) -> None:
-        """Initialize all configuration components."""
+        """Initialize the configuration components every run needs.
+
+        The remaining sections are only materialized on first access, through
+        the cached properties below.
+        """
         self.paths = Paths(**self.config['paths'])
         self.database = Database(**self.config['database']['akshare'])
         self.date_range = DateRange(**self.config['date_range'])
+        self.price_types = self.config['validation']['price_types']
 
-        # Initialize AkShare configuration
+    @functools.cached_property
+    def akshare(self) -> AkShareConfig:
+        """AkShare data source configuration."""
         akshare_config = self.config['data_sources']['akshare']
         price_types = {
             name: PriceType(**config)
             for name, config in akshare_config['price_types'].items()
         }
-        self.akshare = AkShareConfig(
+        return AkShareConfig(
             name=akshare_config['name'],
             description=akshare_config['description'],
             price_types=price_types,
             column_mapping=akshare_config['column_mapping']
         )
 
-        # Initialize trading universe
+    @functools.cached_property
+    def trading_universe(self) -> TradingUniverse:
+        """Configured ETF trading universe."""
         etfs = {
             symbol: ETF(**config)
             for symbol, config in self.config['trading_universe']['etfs'].items()
         }
-        self.trading_universe = TradingUniverse(etfs=etfs)
+        return TradingUniverse(etfs=etfs)
 
-        # Initialize database schemas
-        self.database_schemas = {
+    @functools.cached_property
+    def database_schemas(self) -> Dict[str, DatabaseSchema]:
+        """Database schemas by table name."""
+        return {
             name: DatabaseSchema(**schema)
             for name, schema in self.config['database_schemas'].items()
         }
 
-        # Initialize validation rules
-        self.validation_rules = {
+    @functools.cached_property
+    def validation_rules(self) -> Dict[str, ValidationRules]:
+        """Validation rules by table name."""
+        return {
             name: ValidationRules(**rules)
             for name, rules in self.config['validation']['rules'].items()
         }
-        self.price_types = self.config['validation']['price_types']
 
-    def get_etf_symbols(self) -> List[str]:
-        """Get list of ETF symbols from configuration."""
-        return list(self.trading_universe.etfs.keys())
+    # Accessor results never change after loading; they are read straight
+    # from the parsed config so no dataclass tree is built just to list keys
+    @functools.cached_property
+    def _etf_symbols(self) -> Tuple[str, ...]:
+        return tuple(self.config['trading_universe']['etfs'])
+
+    @functools.cached_property
+    def _price_type_names(self) -> Tuple[str, ...]:
+        return tuple(self.config['data_sources']['akshare']['price_types'])
+
+    @functools.cached_property
+    def _column_mapping(self) -> Mapping[str, str]:
+        return MappingProxyType(dict(self.config['data_sources']['akshare']['column_mapping']))
+
+    @functools.cached_property
+    def _required_columns(self) -> Tuple[str, ...]:
+        return tuple(self.config['validation']['rules']['daily_prices']['required_columns'])
+
+    @functools.cached_property
+    def _non_null_columns(self) -> Tuple[str, ...]:
+        return tuple(self.config['validation']['rules']['daily_prices']['non_null_columns'])
+
+    def get_etf_symbols(self) -> Tuple[str, ...]:
+        """Get the ETF symbols from configuration."""
+        return self._etf_symbols
 
-    def get_price_types(self) -> List[str]:
-        """Get list of price types from configuration."""
-        """Get list of available price types."""
-        return list(self.akshare.price_types.keys())
+    def get_price_types(self) -> Tuple[str, ...]:
+        """Get the available price types from configuration."""
+        return self._price_type_names
 
-    def get_column_mapping(self) -> Dict[str, str]:
-        """Get the column mapping for AkShare data."""
-        return self.akshare.column_mapping
+    def get_column_mapping(self) -> Mapping[str, str]:
+        """Get the read-only column mapping for AkShare data."""
+        return self._column_mapping
 
-    def get_required_columns(self) -> List[str]:
-        """Get the list of required columns for daily prices."""
-        return self.validation_rules['daily_prices'].required_columns
+    def get_required_columns(self) -> Tuple[str, ...]:
+        """Get the required columns for daily prices."""
+        return self._required_columns
 
-    def get_non_null_columns(self) -> List[str]:
-        """Get the list of non-null columns for daily prices."""
-        return self.validation_rules['daily_prices'].non_null_columns
+    def get_non_null_columns(self) -> Tuple[str, ...]:
+        """Get the non-null columns for daily prices."""
+        return self._non_null_columns
 
     def get_database_schema(self, schema_name: str) -> Optional[DatabaseSchema]:
         """Get database schema by name."""
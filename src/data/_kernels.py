@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Compiled technical indicator kernels
+====================================
+
+Single-pass rolling-window and EMA kernels used by IndicatorCalculator,
+decorated with numba_compat.njit. Rolling outputs match the pandas
+rolling(window=period) equivalents: the first period - 1 entries, and any
+window containing a NaN, are NaN.
+"""
+
+import numpy as np
+
+from numba_compat import njit
+
+
+@njit(cache=True, nogil=True)
+def ma(close, period):
+    """Simple moving average over a running sum.
+
+    Args:
+        close: Close prices of shape (N,)
+        period: Window length in bars
+
+    Returns:
+        Array of shape (N,) with the rolling mean
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    n_nan = 0
+    for i in range(n):
+        x = close[i]
+        if np.isnan(x):
+            n_nan += 1
+        else:
+            total += x
+        if i >= period:
+            old = close[i - period]
+            if np.isnan(old):
+                n_nan -= 1
+            else:
+                total -= old
+        if i >= period - 1 and n_nan == 0:
+            out[i] = total / period
+    return out
+
+
+@njit(cache=True, nogil=True)
+def rsi(close, period):
+    """Relative Strength Index with Wilder smoothing, in one pass.
+
+    The first averages are the simple means of the gains and losses over the
+    first ``period`` bar-to-bar changes; after that each average follows
+    avg = (avg * (period - 1) + x) / period.
+
+    Args:
+        close: Close prices of shape (N,)
+        period: Smoothing period in bars
+
+    Returns:
+        Array of shape (N,) with RSI in [0, 100]; the first ``period`` entries
+        are NaN, as are bars where both averages are zero
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(n):
+        if i > 0:
+            delta = close[i] - close[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if np.isnan(delta):
+                gain = loss = np.nan
+            if i <= period:
+                avg_gain += gain / period
+                avg_loss += loss / period
+            else:
+                avg_gain = (avg_gain * (period - 1) + gain) / period
+                avg_loss = (avg_loss * (period - 1) + loss) / period
+        if i >= period:
+            if avg_loss > 0:
+                out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            elif avg_gain > 0:
+                out[i] = 100.0
+    return out
+
+
+@njit(cache=True, nogil=True)
+def rolling_mean_std(close, period):
+    """Rolling mean and sample standard deviation (ddof=1) in one pass.
+
+    Uses Welford's updates, adding the entering price and removing the leaving
+    one, so the variance stays accurate without a sum of squares.
+
+    Args:
+        close: Close prices of shape (N,)
+        period: Window length in bars
+
+    Returns:
+        Tuple of (mean, std) arrays of shape (N,)
+    """
+    n = close.shape[0]
+    mean_out = np.full(n, np.nan)
+    std_out = np.full(n, np.nan)
+
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        x = close[i]
+        if not np.isnan(x):
+            count += 1
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+        if i >= period:
+            old = close[i - period]
+            if not np.isnan(old):
+                count -= 1
+                if count == 0:
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    delta = old - mean
+                    mean -= delta / count
+                    m2 -= delta * (old - mean)
+        if i >= period - 1 and count == period:
+            mean_out[i] = mean
+            if period > 1:
+                std_out[i] = np.sqrt(max(m2, 0.0) / (period - 1))
+    return mean_out, std_out
+
+
+@njit(cache=True, nogil=True)
+def ema(x, span):
+    """Exponential moving average, the recurrence of pandas ewm(adjust=False).
+
+    NaNs carry the previous average forward and still decay its weight, as
+    pandas does with ignore_na=False.
+
+    Args:
+        x: Input series of shape (N,)
+        span: EMA span; the smoothing factor is 2 / (span + 1)
+
+    Returns:
+        Array of shape (N,) with the EMA; NaN until the first finite input
+    """
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    weighted = np.nan
+    old_wt = 1.0
+    for i in range(n):
+        value = x[i]
+        if np.isnan(weighted):
+            if not np.isnan(value):
+                weighted = value
+                old_wt = 1.0
+        else:
+            old_wt *= decay
+            if not np.isnan(value):
+                weighted = (old_wt * weighted + alpha * value) / (old_wt + alpha)
+                old_wt = 1.0
+        out[i] = weighted
+    return out
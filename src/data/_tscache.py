@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Columnar price history cache
+============================
+
+Per-symbol Parquet files holding a symbol's full daily OHLCV history next to
+the SQLite database. Columns are stored zstd-compressed, with dictionary
+encoding for the repetitive price_type, so a single-column read such as the
+close series touches only that column's pages. Each file records the database
+version it was read at and is only served for that version, so writes by any
+connection or process invalidate it. Requires pyarrow; without it
+``available()`` is False and callers read from SQLite instead.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+    pq = None
+
+# Columns cached per symbol, as selected from daily_prices
+COLUMNS = ('date', 'price_type', 'open', 'high', 'low', 'close', 'volume')
+
+# Parquet schema metadata key holding the database version of a file
+VERSION_KEY = b'db_version'
+
+
+def available() -> bool:
+    """Whether pyarrow is installed and the cache can be used."""
+    return pyarrow is not None
+
+
+def _path(cache_dir: Path, symbol: str) -> Path:
+    return cache_dir / f"{symbol}.parquet"
+
+
+def write(cache_dir: Path, symbol: str, history: pd.DataFrame,
+          db_version: Tuple[int, ...]) -> None:
+    """Write a symbol's full price history to its cache file.
+
+    Args:
+        cache_dir: Directory holding the cache files
+        symbol: Symbol the history belongs to
+        history: DataFrame with the COLUMNS columns, ordered by date
+        db_version: Database version taken before history was queried
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    table = pyarrow.Table.from_pandas(history, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        VERSION_KEY: json.dumps(db_version).encode(),
+    })
+    pq.write_table(table, _path(cache_dir, symbol), compression='zstd',
+                   compression_level=3, use_dictionary=['price_type'])
+
+
+def read(cache_dir: Path, symbol: str, columns: List[str], start_date: str,
+         end_date: str, db_version: Tuple[int, ...]) -> Optional[pd.DataFrame]:
+    """Read selected columns of a symbol's cached history within a date range.
+
+    Args:
+        cache_dir: Directory holding the cache files
+        symbol: Symbol to read
+        columns: Columns to read
+        start_date: First date to keep, compared as text like SQLite does
+        end_date: Last date to keep
+        db_version: Current database version
+
+    Returns:
+        DataFrame of the requested columns, or None if the symbol is not
+        cached for this database version
+    """
+    path = _path(cache_dir, symbol)
+    if not path.exists():
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    if metadata.get(VERSION_KEY) != json.dumps(db_version).encode():
+        return None
+    table = pq.read_table(path, columns=columns,
+                          filters=[('date', '>=', start_date), ('date', '<=', end_date)])
+    return table.to_pandas()
+
+
+def invalidate(cache_dir: Path, symbols: Iterable[str]) -> None:
+    """Remove the cache files of symbols whose prices changed.
+
+    Args:
+        cache_dir: Directory holding the cache files
+        symbols: Symbols that received new price rows
+    """
+    for symbol in symbols:
+        _path(cache_dir, symbol).unlink(missing_ok=True)
+
+
+def clear(cache_dir: Path) -> None:
+    """Remove every cache file.
+
+    Args:
+        cache_dir: Directory holding the cache files
+    """
+    for path in cache_dir.glob('*.parquet'):
+        path.unlink()
@@ -1,19 +1,62 @@
 #!/usr/bin/env python3
 import akshare as ak
+import numpy as np
 import pandas as pd
 import sqlite3
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 from datetime import datetime
 import logging
 from pathlib import Path
 import time
 import random
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from fake_useragent import UserAgent
 import requests
+from requests.adapters import HTTPAdapter
 from config_manager import ConfigManager
 
 
+# Session and User-Agent of the collector fetch running on this thread, if any
+_fetch_context = threading.local()
+_api_request = requests.api.request
+if getattr(_api_request, '__module__', None) == __name__:
+    # Reloaded: wrap the original function, not the previous router
+    _api_request = _api_request.__wrapped__
+
+
+def _routed_request(method, url, **kwargs):
+    """requests.api.request, sent through the calling collector's session.
+
+    AkShare issues its HTTP calls with requests.get and friends, which all go
+    through requests.api.request. While a collector fetch runs on the calling
+    thread, those calls use the collector's pooled session and the fetch's
+    User-Agent; all other calls pass through unchanged.
+    """
+    session = getattr(_fetch_context, 'session', None)
+    if session is None:
+        return _api_request(method, url, **kwargs)
+    headers = {'User-Agent': _fetch_context.user_agent, **(kwargs.pop('headers', None) or {})}
+    return session.request(method=method, url=url, headers=headers, **kwargs)
+
+
+# Installed once per process; it only reroutes calls made inside a fetch
+_routed_request.__wrapped__ = _api_request
+requests.api.request = _routed_request
+
+
 class AkShareCollector:
+    # AkShare adjust parameter for each configured price type
+    PRICE_TYPE_MAP = {
+        'non_restored': 'qfq',
+        'forward_restored': 'qfq',
+        'backward_restored': 'hfq'
+    }
+
+    DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
     def __init__(self, config_manager: ConfigManager):
         """Initialize the AkShare data collector.
 
@@ -25,24 +68,60 @@ class AkShareCollector:
         self._setup_database()
 
         # Anti-crawler settings
-        self.min_delay = 3  # Minimum delay between requests in seconds
-        self.max_delay = 7  # Maximum delay between requests in seconds
+        self.rate_limit_requests = 6  # Maximum requests started per window
+        self.rate_limit_window = 30  # Rate limit window in seconds
         self.max_retries = 3  # Maximum number of retries for failed requests
         self.retry_delay = 10  # Delay between retries in seconds
+        self.max_workers = 8  # Concurrent (symbol, price_type) fetches
 
-        # Initialize fake user agent
-        try:
-            self.user_agent = UserAgent()
-        except Exception as e:
-            self.logger.warning(f"Failed to initialize UserAgent: {str(e)}")
-            self.user_agent = None
+        # Validation column sets are fixed by the configuration
+        self._required_columns = frozenset(self.config.get_required_columns())
+        self._non_null_columns = self.config.get_non_null_columns()
+
+        # Numeric columns are pinned to their schema dtype so every fetched
+        # frame shares one layout and collect_data's concat never upcasts
+        schema = self.config.get_database_schema('daily_prices')
+        self._numeric_dtypes = {col: dtype for col, dtype in schema.dtypes.items()
+                                if dtype == 'float64'}
+
+        # Renamed column Index per raw AkShare header; the header rarely changes
+        self._column_mapping = self.config.get_column_mapping()
+        self._renamed_columns = {}
+
+        # Metadata columns are categoricals over the configured values, which
+        # keeps them small and lets collected frames concatenate without upcasting
+        self._symbol_dtype = pd.CategoricalDtype(self.config.get_etf_symbols())
+        self._price_type_dtype = pd.CategoricalDtype(self.config.get_price_types())
+
+        # Start times of the most recent requests, shared by all fetch workers
+        self._request_times = deque(maxlen=self.rate_limit_requests)
+        self._rate_limit_lock = threading.Lock()
+
+        # One HTTP session for the collector's lifetime, with a keep-alive
+        # connection pool large enough for every fetch worker. AkShare's
+        # requests are routed through it by _fetch_through_session
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Connection': 'keep-alive',
+        })
 
     def _setup_database(self) -> None:
         """Set up the SQLite database connection and create tables if they don't exist."""
         db_path = Path(self.config.get_database_url().replace('sqlite:///', ''))
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        self.conn = sqlite3.connect(db_path)
+        # Autocommit mode: collect_data manages its one write transaction explicitly
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        # WAL with NORMAL sync avoids an fsync per commit; bulk loads are rerunnable
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
         self._create_tables()
 
     def _create_tables(self) -> None:
@@ -52,11 +131,19 @@ class AkShareCollector:
             raise ValueError("Daily prices schema not found in configuration")
 
         columns = []
+        insert_cols = []
         for col, dtype in schema.dtypes.items():
-            if dtype == 'INTEGER PRIMARY KEY AUTOINCREMENT':
+            if dtype.startswith('INTEGER PRIMARY KEY'):
                 columns.append(f"{col} {dtype}")
             else:
                 columns.append(f"{col} {dtype.replace('datetime64[ns]', 'TEXT')}")
+                insert_cols.append(col)
+
+        # The schema is fixed, so the insert statement is built once here; the
+        # database persists between runs, so rows already stored are skipped
+        self._insert_cols = insert_cols
+        self._insert_sql = (f"INSERT OR IGNORE INTO daily_prices ({', '.join(insert_cols)}) "
+                            f"VALUES ({', '.join('?' * len(insert_cols))})")
 
         create_table_sql = f"""
         CREATE TABLE IF NOT EXISTS daily_prices (
@@ -67,11 +154,35 @@ class AkShareCollector:
         self.conn.execute(create_table_sql)
         self.conn.commit()
 
-    def _random_delay(self) -> None:
-        """Add a random delay between requests to avoid being blocked."""
-        delay = random.uniform(self.min_delay, self.max_delay)
-        self.logger.debug(f"Waiting for {delay:.2f} seconds...")
-        time.sleep(delay)
+    def _wait_for_request_slot(self) -> None:
+        """Block until the rate limit allows another request to start.
+
+        At most rate_limit_requests requests start within any rate_limit_window
+        seconds. Time already spent waiting on responses counts toward the
+        window, so there is no sleep while the limit has room.
+        """
+        with self._rate_limit_lock:
+            if len(self._request_times) == self._request_times.maxlen:
+                delay = self.rate_limit_window - (time.monotonic() - self._request_times[0])
+                if delay > 0:
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug("Rate limit reached, waiting for %.2f seconds...", delay)
+                    time.sleep(delay)
+            self._request_times.append(time.monotonic())
+
+    @functools.cached_property
+    def _ua_pool(self) -> List[str]:
+        """User agent strings sampled once, on the first request.
+
+        Loading the UserAgent dataset is slow, so collectors that never fetch
+        never pay for it; UserAgent.random also scans the dataset on every call.
+        """
+        try:
+            user_agent = UserAgent()
+            return [user_agent.random for _ in range(32)]
+        except Exception as e:
+            self.logger.warning("Failed to initialize UserAgent: %s", e)
+            return [self.DEFAULT_USER_AGENT]
 
     def _get_random_user_agent(self) -> str:
         """Get a random user agent string.
@@ -79,9 +190,27 @@ class AkShareCollector:
         Returns:
             str: Random user agent string
         """
-        if self.user_agent:
-            return self.user_agent.random
-        return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        return random.choice(self._ua_pool)
+
+    def _fetch_through_session(self, fetch, **kwargs):
+        """Call an AkShare function with its requests routed through self.session.
+
+        The User-Agent is passed with each request rather than set on the
+        shared session, so concurrent workers do not overwrite each other's.
+
+        Args:
+            fetch: AkShare function to call
+            **kwargs: Arguments for fetch
+
+        Returns:
+            Whatever fetch returns
+        """
+        _fetch_context.session = self.session
+        _fetch_context.user_agent = self._get_random_user_agent()
+        try:
+            return fetch(**kwargs)
+        finally:
+            _fetch_context.session = None
 
     def _fetch_etf_data(self, symbol: str, price_type: str) -> Optional[pd.DataFrame]:
         """Fetch ETF data from AkShare with retry mechanism.
@@ -95,49 +224,51 @@ class AkShareCollector:
         """
         for attempt in range(self.max_retries):
             try:
-                # Add random delay before each request
-                self._random_delay()
-
-                # Set random user agent for this request
-                headers = {
-                    'User-Agent': self._get_random_user_agent(),
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5',
-                    'Connection': 'keep-alive',
-                }
-
-                # Map price type to AkShare function parameter
-                price_type_map = {
-                    'non_restored': 'qfq',
-                    'forward_restored': 'qfq',
-                    'backward_restored': 'hfq'
-                }
-
-                # Set custom headers for AkShare session
-                session = requests.Session()
-                session.headers.update(headers)
-
-                # Fetch data using East Money (with adjust parameter for different restorations)
-                df = ak.fund_etf_hist_em(symbol=symbol, adjust=price_type_map[price_type])
+                # Respect the rate limit before each request
+                self._wait_for_request_slot()
+
+                # Fetch data using East Money (with adjust parameter for different
+                # restorations), over the pooled session with a random user agent
+                df = self._fetch_through_session(ak.fund_etf_hist_em, symbol=symbol,
+                                                 adjust=self.PRICE_TYPE_MAP[price_type])
 
                 # Rename columns according to configuration
-                df = df.rename(columns=self.config.get_column_mapping())
+                df.columns = self._rename_columns(df.columns)
+                df = df.astype({col: dtype for col, dtype in self._numeric_dtypes.items()
+                                if col in df.columns}, copy=False)
 
                 # Add metadata columns
-                df['symbol'] = symbol
-                df['price_type'] = price_type
+                df['symbol'] = pd.Series(symbol, index=df.index, dtype=self._symbol_dtype)
+                df['price_type'] = pd.Series(price_type, index=df.index, dtype=self._price_type_dtype)
 
                 return df
 
             except Exception as e:
-                self.logger.warning(f"Attempt {attempt + 1}/{self.max_retries} failed for {symbol} ({price_type}): {str(e)}")
+                self.logger.warning("Attempt %d/%d failed for %s (%s): %s",
+                                    attempt + 1, self.max_retries, symbol, price_type, e)
                 if attempt < self.max_retries - 1:
-                    self.logger.info(f"Retrying in {self.retry_delay} seconds...")
+                    self.logger.info("Retrying in %s seconds...", self.retry_delay)
                     time.sleep(self.retry_delay)
                 else:
-                    self.logger.error(f"All attempts failed for {symbol} ({price_type})")
+                    self.logger.error("All attempts failed for %s (%s)", symbol, price_type)
                     return None
 
+    def _rename_columns(self, columns: pd.Index) -> pd.Index:
+        """Map raw AkShare column names to the configured names.
+
+        Args:
+            columns: Column labels of a fetched DataFrame
+
+        Returns:
+            Index of renamed labels; labels without a mapping are kept
+        """
+        key = tuple(columns)
+        renamed = self._renamed_columns.get(key)
+        if renamed is None:
+            renamed = self._renamed_columns[key] = pd.Index(
+                [self._column_mapping.get(col, col) for col in key])
+        return renamed
+
     def _validate_data(self, df: pd.DataFrame) -> bool:
         """Validate the fetched data against configuration rules.
 
@@ -148,75 +279,113 @@ class AkShareCollector:
             bool: True if data is valid, False otherwise
         """
         # Check required columns
-        required_cols = self.config.get_required_columns()
-        if not all(col in df.columns for col in required_cols):
-            self.logger.error(f"Missing required columns: {set(required_cols) - set(df.columns)}")
+        missing_cols = self._required_columns.difference(df.columns)
+        if missing_cols:
+            self.logger.error("Missing required columns: %s", set(missing_cols))
             return False
 
-        # Check non-null columns
-        non_null_cols = self.config.get_non_null_columns()
-        if df[non_null_cols].isnull().any().any():
+        # Check non-null columns one at a time, stopping at the first null
+        if any(df[col].hasnans for col in self._non_null_columns):
             self.logger.error("Found null values in non-null columns")
             return False
 
         return True
 
     def _store_data(self, df: pd.DataFrame) -> None:
-        """Store the validated data in the database.
+        """Insert the validated data into the database.
+
+        The rows join the caller's open transaction; collect_data commits once
+        after all batches.
 
         Args:
             df: DataFrame to store
         """
+        # Rows are zipped from the column Series directly, without copying the frame;
+        # dates use the same text format to_sql wrote, so they stay comparable
+        columns = [df[col] for col in self._insert_cols]
+        columns[self._insert_cols.index('date')] = df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        rows = zip(*columns)
         try:
-            df.to_sql('daily_prices', self.conn, if_exists='append', index=False)
-            self.conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error storing data: {str(e)}")
-            self.conn.rollback()
+            self.conn.executemany(self._insert_sql, rows)
+        except sqlite3.Error as e:
+            self.logger.error("Error storing data: %s", e)
+
+    def _collect_one(self, symbol: str, price_type: str, start: np.datetime64,
+                     end: np.datetime64) -> Optional[pd.DataFrame]:
+        """Fetch, filter and validate one symbol and price type.
+
+        Runs on a worker thread of collect_data, which stores the result.
+
+        Args:
+            symbol: ETF symbol
+            price_type: Type of price data to fetch
+            start: First date to keep
+            end: Last date to keep
 
-    def collect_data(self) -> pd.DataFrame:
-        """Collect data for all configured ETFs and price types.
-        
         Returns:
-            DataFrame containing all collected data
+            DataFrame of the validated records or None if fetch or validation fails
         """
-        etf_symbols = self.config.get_etf_symbols()
-        price_types = self.config.get_price_types()
-        date_range = self.config.get_date_range()
-        all_data = []
+        etf_info = self.config.get_etf_info(symbol)
+        self.logger.info("Fetching %s data for %s (%s)", price_type, symbol, etf_info.name)
+
+        # Fetch data
+        df = self._fetch_etf_data(symbol, price_type)
+        if df is None:
+            return None
 
-        self.logger.info(f"Starting data collection for {len(etf_symbols)} ETFs")
-        self.logger.info(f"Date range: {date_range.start_date} to {date_range.end_date}")
+        # Parse dates and filter by date range in one chain
+        df = (df.assign(date=pd.to_datetime(df['date'], cache=True))
+                .loc[lambda d: (d['date'].to_numpy() >= start) & (d['date'].to_numpy() <= end)])
 
-        for symbol in etf_symbols:
-            etf_info = self.config.get_etf_info(symbol)
-            self.logger.info(f"Processing {symbol} ({etf_info.name})")
+        # Validate data
+        if not self._validate_data(df):
+            self.logger.error("Data validation failed for %s (%s)", symbol, price_type)
+            return None
 
-            for price_type in price_types:
-                self.logger.info(f"Fetching {price_type} data")
+        return df
 
-                # Fetch data
-                df = self._fetch_etf_data(symbol, price_type)
-                if df is None:
-                    continue
+    def collect_data(self, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Collect data for the given ETFs, or all configured ETFs, and all price types.
 
-                # Filter by date range
-                df['date'] = pd.to_datetime(df['date'])
-                mask = (df['date'] >= pd.to_datetime(date_range.start_date)) & \
-                       (df['date'] <= pd.to_datetime(date_range.end_date))
-                df = df[mask]
+        Requests are network-bound and mostly spent in the anti-crawler delay,
+        so they are issued from a thread pool where the delays overlap. Results
+        are stored from this thread in completion order, in a single transaction.
+
+        Args:
+            symbols: ETF symbols to collect; defaults to every configured ETF
+        
+        Returns:
+            DataFrame containing all collected data
+        """
+        etf_symbols = self.config.get_etf_symbols() if symbols is None else symbols
+        price_types = self.config.get_price_types()
+        date_range = self.config.get_date_range()
+        # Range bounds are parsed once, not once per task
+        start = pd.Timestamp(date_range.start_date).to_datetime64()
+        end = pd.Timestamp(date_range.end_date).to_datetime64()
+        tasks = [(symbol, price_type) for symbol in etf_symbols for price_type in price_types]
 
-                # Validate data
-                if not self._validate_data(df):
-                    self.logger.error(f"Data validation failed for {symbol} ({price_type})")
-                    continue
+        self.logger.info("Starting data collection for %d ETFs", len(etf_symbols))
+        self.logger.info("Date range: %s to %s", date_range.start_date, date_range.end_date)
 
-                # Store data
-                self._store_data(df)
-                self.logger.info(f"Successfully stored {len(df)} records for {symbol} ({price_type})")
-                
-                # Add to collected data
-                all_data.append(df)
+        all_data = []
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._collect_one, symbol, price_type, start, end): (symbol, price_type)
+                           for symbol, price_type in tasks}
+                for future in as_completed(futures):
+                    symbol, price_type = futures[future]
+                    df = future.result()
+                    if df is None:
+                        continue
+                    self._store_data(df)
+                    self.logger.info("Successfully stored %d records for %s (%s)", len(df), symbol, price_type)
+                    all_data.append(df)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
 
         self.logger.info("Data collection completed")
         
@@ -227,9 +396,11 @@ class AkShareCollector:
             return pd.DataFrame()  # Return empty DataFrame if no data was collected
 
     def close(self) -> None:
-        """Close the database connection."""
+        """Close the database connection and HTTP session."""
         if hasattr(self, 'conn'):
             self.conn.close()
+        if hasattr(self, 'session'):
+            self.session.close()
 
     def __enter__(self):
         return self
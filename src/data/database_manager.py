@@ -1,13 +1,66 @@
 #!/usr/bin/env python3
+import json
 import sqlite3
+from datetime import datetime
 from typing import Dict, List, Optional
 import pandas as pd
 from pathlib import Path
 import logging
 from config_manager import ConfigManager
+from strategy._db_version import database_version
+from . import _tscache
+
+
+def indicator_params_key(params: Dict) -> str:
+    """Serialize indicator parameters into the key stored in indicator_params.
+
+    Keys are sorted so the same parameters always produce the same string,
+    whatever order the dict was built in.
+
+    Args:
+        params: Parameters used to calculate an indicator
+
+    Returns:
+        Canonical JSON string of the parameters
+    """
+    return json.dumps(params, sort_keys=True)
 
 
 class DatabaseManager:
+    # Hot lookups are fixed SQL strings, so sqlite3's statement cache reuses
+    # their compiled form and only the parameters are bound per call
+    PRICE_QUERY = """
+        SELECT * FROM daily_prices
+        WHERE symbol = ?
+        AND date BETWEEN ? AND ?
+        ORDER BY date
+        """
+    PRICE_CLOSE_QUERY = """
+        SELECT date, price_type, close FROM daily_prices
+        WHERE symbol = ?
+        AND date BETWEEN ? AND ?
+        ORDER BY date
+        """
+    PRICE_HISTORY_QUERY = f"""
+        SELECT {', '.join(_tscache.COLUMNS)} FROM daily_prices
+        WHERE symbol = ?
+        ORDER BY date
+        """
+    PRICE_SUMMARY_QUERY = """
+        SELECT CAST(symbol AS TEXT) AS symbol, MAX(date) AS last_update, COUNT(*) AS data_points
+        FROM daily_prices
+        WHERE date BETWEEN ? AND ?
+        GROUP BY symbol
+        """
+    INDICATOR_QUERY = """
+        SELECT * FROM technical_indicators
+        WHERE symbol = ?
+        AND indicator_name = ?
+        AND indicator_params = ?
+        AND date BETWEEN ? AND ?
+        ORDER BY date
+        """
+
     def __init__(self, config_manager: ConfigManager):
         """Initialize the database manager.
 
@@ -16,6 +69,8 @@ class DatabaseManager:
         """
         self.config = config_manager
         self.logger = logging.getLogger(__name__)
+        # Per-symbol columnar price cache, used when pyarrow is installed
+        self.parquet_dir = Path(self.config.get_data_dir()) / 'parquet'
         self._setup_database()
 
     def _drop_existing_tables(self) -> None:
@@ -24,15 +79,37 @@ class DatabaseManager:
         self.conn.execute("DROP TABLE IF EXISTS technical_indicators")
         self.conn.commit()
 
+    def reset(self) -> None:
+        """Delete all stored prices and indicators and recreate empty tables.
+
+        The database otherwise persists between runs; call this explicitly for
+        a clean rebuild.
+        """
+        self._drop_existing_tables()
+        self._create_tables()
+        _tscache.clear(self.parquet_dir)
+
     def _setup_database(self) -> None:
         """Set up the SQLite database connection and create tables if they don't exist."""
         db_path = Path(self.config.get_database_url().replace('sqlite:///', ''))
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
+        self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
-        self._drop_existing_tables()  # Drop existing tables before creating new ones
+        self._configure_connection()
         self._create_tables()
 
+    def _configure_connection(self) -> None:
+        """Tune the connection for bulk writes with concurrent readers."""
+        # WAL lets readers proceed during writes; NORMAL sync skips the fsync
+        # per commit, which is safe in WAL mode short of power loss
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-64000")  # 64 MB page cache
+        self.conn.execute("PRAGMA mmap_size=2147483648")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+
     def _create_tables(self) -> None:
         """Create database tables based on the schema configuration."""
         # Create daily prices table
@@ -42,7 +119,7 @@ class DatabaseManager:
 
         columns = []
         for col, dtype in schema.dtypes.items():
-            if dtype == 'INTEGER PRIMARY KEY AUTOINCREMENT':
+            if dtype.startswith('INTEGER PRIMARY KEY'):
                 columns.append(f"{col} {dtype}")
             else:
                 columns.append(f"{col} {dtype.replace('datetime64[ns]', 'TEXT')}")
@@ -57,7 +134,7 @@ class DatabaseManager:
         # Create technical indicators table
         create_indicators_table_sql = """
         CREATE TABLE IF NOT EXISTS technical_indicators (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id INTEGER PRIMARY KEY,
             date TEXT NOT NULL,
             symbol TEXT NOT NULL,
             indicator_name TEXT NOT NULL,
@@ -68,8 +145,21 @@ class DatabaseManager:
         )
         """
 
+        # Lookup indexes matching the WHERE/ORDER BY of get_price_data and
+        # get_indicator_data: equality columns first, then the date range
+        create_indexes_sql = [
+            "CREATE INDEX IF NOT EXISTS idx_dp_symbol_date ON daily_prices(symbol, date)",
+            # The backtest runners' lookup also filters on price_type
+            "CREATE INDEX IF NOT EXISTS idx_dp_symbol_type_date "
+            "ON daily_prices(symbol, price_type, date)",
+            "CREATE INDEX IF NOT EXISTS idx_ti_lookup "
+            "ON technical_indicators(symbol, indicator_name, indicator_params, date)",
+        ]
+
         self.conn.execute(create_prices_table_sql)
         self.conn.execute(create_indicators_table_sql)
+        for sql in create_indexes_sql:
+            self.conn.execute(sql)
         self.conn.commit()
 
     def store_price_data(self, df: pd.DataFrame) -> None:
@@ -78,19 +168,15 @@ class DatabaseManager:
         Args:
             df: DataFrame containing price data
         """
+        if df.empty:
+            return
         try:
-            # Check for existing entries
-            for _, row in df.iterrows():
-                query = """
-                SELECT * FROM daily_prices
-                WHERE date = ? AND symbol = ? AND price_type = ?
-                """
-                existing_data = pd.read_sql_query(query, self.conn, params=(row['date'], row['symbol'], row['price_type']))
-                if existing_data.empty:
-                    # Insert new data if it doesn't exist
-                    df_to_insert = pd.DataFrame([row])
-                    df_to_insert.to_sql('daily_prices', self.conn, if_exists='append', index=False)
-            self.conn.commit()
+            # Rows already stored are skipped by UNIQUE(date, symbol, price_type),
+            # so the whole frame goes in as one statement in one transaction
+            with self.conn:
+                self._insert_many('daily_prices', list(df.columns), self._frame_records(df),
+                                  conflict='IGNORE')
+            _tscache.invalidate(self.parquet_dir, df['symbol'].unique())
         except Exception as e:
             self.logger.error(f"Error storing price data: {str(e)}")
             self.conn.rollback()
@@ -103,19 +189,76 @@ class DatabaseManager:
             indicator_name: Name of the indicator
             params: Parameters used to calculate the indicator
         """
+        if df.empty:
+            return
+        # Metadata columns are scalars, serialized once and broadcast
+        self.store_indicator_rows(df.assign(
+            indicator_name=indicator_name,
+            indicator_params=indicator_params_key(params),
+            created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        ))
+
+    def store_indicator_rows(self, df: pd.DataFrame) -> None:
+        """Store prepared technical indicator rows in the database.
+
+        Rows without a value (e.g. the warm-up bars of a rolling window) are
+        skipped, since indicator_value is NOT NULL. Values already stored for
+        the same date, symbol, indicator and params are replaced.
+
+        Args:
+            df: DataFrame with date, symbol, indicator_name, indicator_params,
+                indicator_value and created_at columns
+        """
+        if df.empty:
+            return
         try:
-            # Add metadata columns
-            df['indicator_name'] = indicator_name
-            df['indicator_params'] = str(params)
-            df['created_at'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            # Store in database
-            df.to_sql('technical_indicators', self.conn, if_exists='append', index=False)
-            self.conn.commit()
+            rows = df[df['indicator_value'].notna()]
+            if rows.empty:
+                return
+            with self.conn:
+                self._insert_many('technical_indicators', list(rows.columns), self._frame_records(rows),
+                                  conflict='REPLACE')
         except Exception as e:
             self.logger.error(f"Error storing indicator data: {str(e)}")
             self.conn.rollback()
 
+    def _insert_many(self, table: str, cols: List[str], records, conflict: Optional[str] = None) -> None:
+        """Append rows to a table with one parameterized executemany.
+
+        Callers wrap this in a transaction (``with self.conn``).
+
+        Args:
+            table: Name of the target table
+            cols: Column names, in the order of each record
+            records: Iterable of tuples of values
+            conflict: Resolution for rows violating a UNIQUE constraint, 'IGNORE'
+                or 'REPLACE'; by default such a row aborts the statement
+        """
+        verb = f"INSERT OR {conflict}" if conflict else "INSERT"
+        sql = f"{verb} INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        self.conn.executemany(sql, records)
+
+    @staticmethod
+    def _frame_records(df: pd.DataFrame):
+        """Convert a DataFrame into row tuples of values sqlite3 can bind.
+
+        Datetime columns become 'YYYY-MM-DD HH:MM:SS' text and numpy scalars
+        become Python ones, as to_sql did.
+
+        Args:
+            df: DataFrame to convert
+
+        Returns:
+            Iterator of row tuples in column order
+        """
+        columns = []
+        for col in df.columns:
+            values = df[col]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                values = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+            columns.append(values.tolist())
+        return zip(*columns)
+
     def get_price_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """Get price data for a symbol within a date range.
 
@@ -127,13 +270,50 @@ class DatabaseManager:
         Returns:
             DataFrame containing price data
         """
-        query = """
-        SELECT * FROM daily_prices
-        WHERE symbol = ?
-        AND date BETWEEN ? AND ?
-        ORDER BY date
+        return self._query_frame(self.PRICE_QUERY, (symbol, start_date, end_date))
+
+    def get_price_summary(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """Get the latest date and row count of every symbol in one query.
+
+        Args:
+            start_date: Start date in YYYYMMDD format
+            end_date: End date in YYYYMMDD format
+
+        Returns:
+            DataFrame with symbol, last_update and data_points columns; symbols
+            without rows in the range are absent
         """
-        return pd.read_sql_query(query, self.conn, params=(symbol, start_date, end_date))
+        return self._query_frame(self.PRICE_SUMMARY_QUERY, (start_date, end_date))
+
+    def get_price_close(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Get close prices for a symbol within a date range.
+
+        Reads only the needed columns from the symbol's columnar cache when
+        pyarrow is installed, filling it from SQLite on a miss or after the
+        database changed; otherwise queries SQLite directly.
+
+        Args:
+            symbol: Symbol to get data for
+            start_date: Start date in YYYYMMDD format
+            end_date: End date in YYYYMMDD format
+
+        Returns:
+            DataFrame with date, price_type and close columns, ordered by date
+        """
+        if not _tscache.available():
+            return self._query_frame(self.PRICE_CLOSE_QUERY, (symbol, start_date, end_date))
+
+        columns = ['date', 'price_type', 'close']
+        # Stamped before the query, so rows committed meanwhile miss the cache
+        db_version = database_version(self.db_path)
+        cached = _tscache.read(self.parquet_dir, symbol, columns, start_date, end_date,
+                               db_version)
+        if cached is None:
+            _tscache.write(self.parquet_dir, symbol,
+                           self._query_frame(self.PRICE_HISTORY_QUERY, (symbol,)), db_version)
+            cached = _tscache.read(self.parquet_dir, symbol, columns, start_date, end_date,
+                                   db_version)
+        return cached
 
     def get_indicator_data(self, symbol: str, indicator_name: str, params: Dict,
                           start_date: str, end_date: str) -> pd.DataFrame:
@@ -149,21 +329,30 @@ class DatabaseManager:
         Returns:
             DataFrame containing indicator data
         """
-        query = """
-        SELECT * FROM technical_indicators
-        WHERE symbol = ?
-        AND indicator_name = ?
-        AND indicator_params = ?
-        AND date BETWEEN ? AND ?
-        ORDER BY date
+        return self._query_frame(self.INDICATOR_QUERY,
+                                 (symbol, indicator_name, indicator_params_key(params), start_date, end_date))
+
+    def _query_frame(self, sql: str, params: tuple) -> pd.DataFrame:
+        """Run a SELECT and build a DataFrame straight from the cursor.
+
+        Args:
+            sql: Query to run
+            params: Values bound to the query's placeholders
+
+        Returns:
+            DataFrame with one column per selected column
         """
-        return pd.read_sql_query(query, self.conn,
-                               params=(symbol, indicator_name, str(params), start_date, end_date))
+        cursor = self.conn.execute(sql, params)
+        columns = [description[0] for description in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
 
     def close(self) -> None:
-        """Close the database connection."""
+        """Refresh query planner statistics and close the database connection."""
         if hasattr(self, 'conn'):
+            self.conn.execute("PRAGMA analysis_limit=400")
+            self.conn.execute("PRAGMA optimize")
             self.conn.close()
+            del self.conn  # Makes a second close() a no-op
 
     def __enter__(self):
         return self
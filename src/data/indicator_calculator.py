@@ -1,9 +1,119 @@
 #!/usr/bin/env python3
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 import logging
-from .database_manager import DatabaseManager
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from .database_manager import DatabaseManager, indicator_params_key
+from . import _kernels
+
+
+def macd_series(close: np.ndarray, fast_period: int, slow_period: int,
+                signal_period: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute the MACD line, signal line and histogram.
+
+    Returns:
+        Tuple of (macd, signal, histogram) arrays of the same shape as close
+    """
+    macd = _kernels.ema(close, fast_period) - _kernels.ema(close, slow_period)
+    signal = _kernels.ema(macd, signal_period)
+    return macd, signal, macd - signal
+
+
+def bollinger_series(close: np.ndarray, period: int,
+                     num_std: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute the middle, upper and lower Bollinger Bands.
+
+    Returns:
+        Tuple of (middle_band, upper_band, lower_band) arrays
+    """
+    # Middle band (SMA) and standard deviation in one pass
+    middle_band, std = _kernels.rolling_mean_std(close, period)
+    return middle_band, middle_band + (std * num_std), middle_band - (std * num_std)
+
+
+def _typed_params(params: Dict, types: Iterable[str]) -> List[str]:
+    """Params keys of a multi-series indicator: its params plus each series' 'type'."""
+    return [indicator_params_key({**params, 'type': series_type}) for series_type in types]
+
+
+def indicator_rows(dates: np.ndarray, symbol: str, indicator_name: str,
+                   series: Dict[str, np.ndarray], created_at: str) -> pd.DataFrame:
+    """Assemble long-format indicator rows from flat arrays.
+
+    The dates are tiled and the params keys repeated once per series. Bars
+    without a value, such as a rolling window's warm-up, are dropped here
+    rather than carried to the database.
+
+    Args:
+        dates: Dates of shape (N,) shared by every series
+        symbol: Symbol the indicator was calculated for
+        indicator_name: Name of the indicator
+        series: Mapping of indicator_params key to its values of shape (N,)
+        created_at: Timestamp stored with every row
+
+    Returns:
+        DataFrame in the technical_indicators column layout
+    """
+    values = np.concatenate(list(series.values()))
+    has_value = ~np.isnan(values)
+    return pd.DataFrame({
+        'date': np.tile(dates, len(series))[has_value],
+        'symbol': symbol,
+        'indicator_name': indicator_name,
+        'indicator_params': np.repeat(list(series), len(dates))[has_value],
+        'indicator_value': values[has_value],
+        'created_at': created_at,
+    }, copy=False)
+
+
+def compute_indicator_rows(symbol: str, dates: np.ndarray, close: np.ndarray,
+                           indicators: Dict, created_at: str) -> pd.DataFrame:
+    """Compute every configured indicator of one symbol without touching the database.
+
+    Module-level so it can run in a worker process.
+
+    Args:
+        symbol: Symbol the prices belong to
+        dates: Dates of shape (N,)
+        close: Close prices of shape (N,), float64
+        indicators: The 'technical_indicators' configuration section
+        created_at: Timestamp stored with every row
+
+    Returns:
+        Long-format rows of all indicators, ready for store_indicator_rows
+    """
+    frames = []
+    if 'ma' in indicators:
+        for period in indicators['ma']['periods']:
+            frames.append(indicator_rows(dates, symbol, 'MA', {
+                indicator_params_key({'period': period}): _kernels.ma(close, period),
+            }, created_at))
+
+    if 'rsi' in indicators:
+        for period in indicators['rsi']['periods']:
+            frames.append(indicator_rows(dates, symbol, 'RSI', {
+                indicator_params_key({'period': period}): _kernels.rsi(close, period),
+            }, created_at))
+
+    if 'macd' in indicators:
+        params = {key: indicators['macd'][key]
+                  for key in ('fast_period', 'slow_period', 'signal_period')}
+        values = macd_series(close, params['fast_period'], params['slow_period'],
+                             params['signal_period'])
+        keys = _typed_params(params, ('macd_line', 'signal_line', 'histogram'))
+        frames.append(indicator_rows(dates, symbol, 'MACD', dict(zip(keys, values)), created_at))
+
+    if 'bollinger_bands' in indicators:
+        params = {key: indicators['bollinger_bands'][key] for key in ('period', 'num_std')}
+        values = bollinger_series(close, params['period'], params['num_std'])
+        keys = _typed_params(params, ('middle_band', 'upper_band', 'lower_band'))
+        frames.append(indicator_rows(dates, symbol, 'BollingerBands', dict(zip(keys, values)),
+                                     created_at))
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
 
 class IndicatorCalculator:
@@ -15,6 +125,64 @@ class IndicatorCalculator:
         """
         self.db = db_manager
         self.logger = logging.getLogger(__name__)
+        # {(symbol, start_date, end_date): (dates, close)}; a symbol's
+        # indicators all read the same range, so it is loaded once
+        self._price_cache = {}
+
+    def clear_cache(self) -> None:
+        """Forget cached price data, e.g. after new prices were stored."""
+        self._price_cache.clear()
+
+    def _load_prices(self, symbol: str, start_date: str, end_date: str):
+        """Load price data for a symbol, memoized per date range.
+
+        Returns:
+            Tuple of (dates, close) arrays, which callers must not modify; close
+            is float64
+        """
+        key = (symbol, start_date, end_date)
+        cached = self._price_cache.get(key)
+        if cached is None:
+            prices = self.db.get_price_close(symbol, start_date, end_date)
+            cached = self._price_cache[key] = (prices['date'].to_numpy(),
+                                               prices['close'].to_numpy(dtype=np.float64))
+        return cached
+
+    def calculate_all(self, symbols: List[str], indicators: Dict, start_date: str,
+                      end_date: str, max_workers: Optional[int] = None) -> None:
+        """Calculate every configured indicator for several symbols.
+
+        Prices are loaded here, the numeric work for each symbol runs in a
+        worker process, and all rows are stored in one transaction.
+
+        Args:
+            symbols: Symbols to calculate for
+            indicators: The 'technical_indicators' configuration section
+            start_date: Start date in YYYYMMDD format
+            end_date: End date in YYYYMMDD format
+            max_workers: Worker processes; defaults to one per symbol, up to the CPU count
+        """
+        created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        jobs = []
+        for symbol in symbols:
+            dates, close = self._load_prices(symbol, start_date, end_date)
+            if len(close):
+                jobs.append((symbol, dates, close))
+        if not jobs or not indicators:
+            return
+
+        workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+        if workers == 1:
+            frames = [compute_indicator_rows(symbol, dates, close, indicators, created_at)
+                      for symbol, dates, close in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(compute_indicator_rows, symbol, dates, close,
+                                           indicators, created_at)
+                           for symbol, dates, close in jobs]
+                frames = [future.result() for future in futures]
+
+        self.db.store_indicator_rows(pd.concat(frames, ignore_index=True))
         
     def calculate_ma(self, symbol: str, period: int, start_date: str, end_date: str) -> pd.DataFrame:
         """Calculate Moving Average.
@@ -29,22 +197,18 @@ class IndicatorCalculator:
             DataFrame containing MA values
         """
         # Get price data
-        df = self.db.get_price_data(symbol, start_date, end_date)
-        if df.empty:
+        dates, close = self._load_prices(symbol, start_date, end_date)
+        if not len(close):
             return pd.DataFrame()
             
         # Calculate MA
-        df['ma'] = df['close'].rolling(window=period).mean()
-        
-        # Prepare result
-        result = df[['date', 'symbol', 'ma']].copy()
-        result = result.rename(columns={'ma': 'indicator_value'})
+        ma = _kernels.ma(close, period)
         
         # Store in database
         params = {'period': period}
-        self.db.store_indicator_data(result, 'MA', params)
+        self._emit_indicator_rows(dates, symbol, 'MA', {indicator_params_key(params): ma})
         
-        return result
+        return pd.DataFrame({'date': dates, 'symbol': symbol, 'indicator_value': ma}, copy=False)
         
     def calculate_rsi(self, symbol: str, period: int, start_date: str, end_date: str) -> pd.DataFrame:
         """Calculate Relative Strength Index.
@@ -59,30 +223,18 @@ class IndicatorCalculator:
             DataFrame containing RSI values
         """
         # Get price data
-        df = self.db.get_price_data(symbol, start_date, end_date)
-        if df.empty:
+        dates, close = self._load_prices(symbol, start_date, end_date)
+        if not len(close):
             return pd.DataFrame()
             
-        # Calculate price changes
-        delta = df['close'].diff()
-        
-        # Calculate gains and losses
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        # Calculate RS and RSI
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-        
-        # Prepare result
-        result = df[['date', 'symbol', 'rsi']].copy()
-        result = result.rename(columns={'rsi': 'indicator_value'})
+        # Wilder-smoothed gain and loss and the RSI in one pass
+        rsi = _kernels.rsi(close, period)
         
         # Store in database
         params = {'period': period}
-        self.db.store_indicator_data(result, 'RSI', params)
+        self._emit_indicator_rows(dates, symbol, 'RSI', {indicator_params_key(params): rsi})
         
-        return result
+        return pd.DataFrame({'date': dates, 'symbol': symbol, 'indicator_value': rsi}, copy=False)
         
     def calculate_macd(self, symbol: str, fast_period: int, slow_period: int, 
                       signal_period: int, start_date: str, end_date: str) -> pd.DataFrame:
@@ -100,47 +252,25 @@ class IndicatorCalculator:
             DataFrame containing MACD values
         """
         # Get price data
-        df = self.db.get_price_data(symbol, start_date, end_date)
-        if df.empty:
+        dates, close = self._load_prices(symbol, start_date, end_date)
+        if not len(close):
             return pd.DataFrame()
             
-        # Calculate EMAs
-        exp1 = df['close'].ewm(span=fast_period, adjust=False).mean()
-        exp2 = df['close'].ewm(span=slow_period, adjust=False).mean()
-        
-        # Calculate MACD line and signal line
-        macd = exp1 - exp2
-        signal = macd.ewm(span=signal_period, adjust=False).mean()
-        
-        # Calculate histogram
-        df['macd'] = macd
-        df['signal'] = signal
-        df['histogram'] = macd - signal
-        
-        # Store MACD line
-        macd_result = df[['date', 'symbol', 'macd']].copy()
-        macd_result = macd_result.rename(columns={'macd': 'indicator_value'})
+        # Calculate MACD line, signal line and histogram
+        macd, signal, histogram = macd_series(close, fast_period, slow_period, signal_period)
+        
+        # Store MACD line, signal line and histogram in one write, each under
+        # the params plus its 'type'
         params = {
             'fast_period': fast_period,
             'slow_period': slow_period,
             'signal_period': signal_period,
-            'type': 'macd_line'
         }
-        self.db.store_indicator_data(macd_result, 'MACD', params)
-        
-        # Store signal line
-        signal_result = df[['date', 'symbol', 'signal']].copy()
-        signal_result = signal_result.rename(columns={'signal': 'indicator_value'})
-        params['type'] = 'signal_line'
-        self.db.store_indicator_data(signal_result, 'MACD', params)
+        keys = _typed_params(params, ('macd_line', 'signal_line', 'histogram'))
+        self._emit_indicator_rows(dates, symbol, 'MACD', dict(zip(keys, (macd, signal, histogram))))
         
-        # Store histogram
-        hist_result = df[['date', 'symbol', 'histogram']].copy()
-        hist_result = hist_result.rename(columns={'histogram': 'indicator_value'})
-        params['type'] = 'histogram'
-        self.db.store_indicator_data(hist_result, 'MACD', params)
-        
-        return df[['date', 'symbol', 'macd', 'signal', 'histogram']]
+        return pd.DataFrame({'date': dates, 'symbol': symbol, 'macd': macd,
+                             'signal': signal, 'histogram': histogram}, copy=False)
         
     def calculate_bollinger_bands(self, symbol: str, period: int, num_std: float,
                                 start_date: str, end_date: str) -> pd.DataFrame:
@@ -157,40 +287,37 @@ class IndicatorCalculator:
             DataFrame containing Bollinger Bands values
         """
         # Get price data
-        df = self.db.get_price_data(symbol, start_date, end_date)
-        if df.empty:
+        dates, close = self._load_prices(symbol, start_date, end_date)
+        if not len(close):
             return pd.DataFrame()
             
-        # Calculate middle band (SMA)
-        df['middle_band'] = df['close'].rolling(window=period).mean()
-        
-        # Calculate standard deviation
-        std = df['close'].rolling(window=period).std()
-        
-        # Calculate upper and lower bands
-        df['upper_band'] = df['middle_band'] + (std * num_std)
-        df['lower_band'] = df['middle_band'] - (std * num_std)
+        # Calculate middle, upper and lower bands
+        middle_band, upper_band, lower_band = bollinger_series(close, period, num_std)
         
-        # Store middle band
-        middle_result = df[['date', 'symbol', 'middle_band']].copy()
-        middle_result = middle_result.rename(columns={'middle_band': 'indicator_value'})
+        # Store middle, upper and lower bands in one write, each under the
+        # params plus its 'type'
         params = {
             'period': period,
             'num_std': num_std,
-            'type': 'middle_band'
         }
-        self.db.store_indicator_data(middle_result, 'BollingerBands', params)
+        keys = _typed_params(params, ('middle_band', 'upper_band', 'lower_band'))
+        self._emit_indicator_rows(dates, symbol, 'BollingerBands',
+                                  dict(zip(keys, (middle_band, upper_band, lower_band))))
         
-        # Store upper band
-        upper_result = df[['date', 'symbol', 'upper_band']].copy()
-        upper_result = upper_result.rename(columns={'upper_band': 'indicator_value'})
-        params['type'] = 'upper_band'
-        self.db.store_indicator_data(upper_result, 'BollingerBands', params)
-        
-        # Store lower band
-        lower_result = df[['date', 'symbol', 'lower_band']].copy()
-        lower_result = lower_result.rename(columns={'lower_band': 'indicator_value'})
-        params['type'] = 'lower_band'
-        self.db.store_indicator_data(lower_result, 'BollingerBands', params)
-        
-        return df[['date', 'symbol', 'middle_band', 'upper_band', 'lower_band']] 
\ No newline at end of file
+        return pd.DataFrame({'date': dates, 'symbol': symbol, 'middle_band': middle_band,
+                             'upper_band': upper_band, 'lower_band': lower_band}, copy=False)
+
+    def _emit_indicator_rows(self, dates: np.ndarray, symbol: str, indicator_name: str,
+                             series: Dict[str, np.ndarray]) -> None:
+        """Store one or more value arrays of an indicator as a single write.
+
+        Args:
+            dates: Dates of shape (N,) shared by every series
+            symbol: Symbol the indicator was calculated for
+            indicator_name: Name of the indicator
+            series: Mapping of indicator_params key to its values of shape (N,)
+        """
+        self.db.store_indicator_rows(indicator_rows(
+            dates, symbol, indicator_name, series,
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        ))
@@ -41,72 +41,51 @@ class DataPipeline:
                     raise ValueError(f"Symbol {symbol} not found in configuration")
                 etf_symbols = [symbol]
             
-            # Update data for each ETF
+            # Collect and store price data for all requested ETFs in one batch
+            self.logger.info(f"Updating data for {len(etf_symbols)} ETFs")
+            price_data = self.collector.collect_data(etf_symbols)
+            if not price_data.empty:
+                self.db_manager.store_price_data(price_data)
+                self.calculator.clear_cache()
+            collected = set(price_data['symbol']) if not price_data.empty else set()
+            
+            # Calculate and store indicators for every ETF that returned data
             for symbol in etf_symbols:
-                self.logger.info(f"Updating data for {symbol}")
-                
-                # Collect price data
-                price_data = self.collector.collect_data()
-                
-                if not price_data.empty:
-                    # Store price data
-                    self.db_manager.store_price_data(price_data)
-                    
-                    # Calculate and store indicators
-                    self._calculate_indicators(symbol, date_range.start_date, date_range.end_date)
-                else:
+                if symbol not in collected:
                     self.logger.warning(f"No price data collected for {symbol}")
+            self._calculate_indicators(
+                [symbol for symbol in etf_symbols if symbol in collected],
+                date_range.start_date,
+                date_range.end_date
+            )
                     
         except Exception as e:
             self.logger.error(f"Error updating data: {str(e)}")
             raise
-        finally:
-            self.db_manager.close()
             
-    def _calculate_indicators(self, symbol: str, start_date: str, end_date: str) -> None:
-        """Calculate technical indicators for a symbol.
+    def reset_data(self) -> None:
+        """Delete all stored price and indicator data."""
+        self.db_manager.reset()
+        self.calculator.clear_cache()
+            
+    def _calculate_indicators(self, symbols: List[str], start_date: str, end_date: str) -> None:
+        """Calculate technical indicators for several symbols.
+        
+        The symbols are computed in parallel worker processes and stored in
+        one transaction.
         
         Args:
-            symbol: Symbol to calculate indicators for
+            symbols: Symbols to calculate indicators for
             start_date: Start date in YYYYMMDD format
             end_date: End date in YYYYMMDD format
         """
         try:
             # Get indicator parameters from config
             indicators = self.config_manager.get_technical_indicators()
-            
-            # Calculate each indicator
-            if 'ma' in indicators:
-                for period in indicators['ma']['periods']:
-                    self.calculator.calculate_ma(symbol, period, start_date, end_date)
-                    
-            if 'rsi' in indicators:
-                for period in indicators['rsi']['periods']:
-                    self.calculator.calculate_rsi(symbol, period, start_date, end_date)
-                    
-            if 'macd' in indicators:
-                params = indicators['macd']
-                self.calculator.calculate_macd(
-                    symbol,
-                    params['fast_period'],
-                    params['slow_period'],
-                    params['signal_period'],
-                    start_date,
-                    end_date
-                )
-                
-            if 'bollinger_bands' in indicators:
-                params = indicators['bollinger_bands']
-                self.calculator.calculate_bollinger_bands(
-                    symbol,
-                    params['period'],
-                    params['num_std'],
-                    start_date,
-                    end_date
-                )
+            self.calculator.calculate_all(symbols, indicators, start_date, end_date)
                 
         except Exception as e:
-            self.logger.error(f"Error calculating indicators for {symbol}: {str(e)}")
+            self.logger.error(f"Error calculating indicators for {', '.join(symbols)}: {str(e)}")
             raise
             
     def validate_data(self, symbol: Optional[str] = None) -> Dict[str, List[str]]:
@@ -146,11 +125,12 @@ class DataPipeline:
                     validation_results[symbol].append("No price data available")
                     continue
                     
-                # Check for missing values
-                missing_values = price_data.isnull().sum()
-                if missing_values.any():
+                # Check for missing values; only columns that have any are counted
+                null_columns = [col for col in price_data.columns if price_data[col].hasnans]
+                if null_columns:
+                    missing_values = price_data[null_columns].isna().sum()
                     validation_results[symbol].append(
-                        f"Missing values found: {missing_values[missing_values > 0].to_dict()}"
+                        f"Missing values found: {missing_values.to_dict()}"
                     )
                     
                 # Check for price anomalies
@@ -188,6 +168,13 @@ class DataPipeline:
         status = {}
         
         try:
+            # Latest date and row count of every symbol from one aggregate query
+            date_range = self.config_manager.get_date_range()
+            summary = self.db_manager.get_price_summary(
+                date_range.start_date,
+                date_range.end_date
+            ).set_index('symbol')
+            
             for symbol in self.config_manager.get_etf_symbols():
                 status[symbol] = {
                     'last_update': None,
@@ -195,17 +182,9 @@ class DataPipeline:
                     'indicators': {}
                 }
                 
-                # Get latest price data
-                date_range = self.config_manager.get_date_range()
-                price_data = self.db_manager.get_price_data(
-                    symbol,
-                    date_range.start_date,
-                    date_range.end_date
-                )
-                
-                if not price_data.empty:
-                    status[symbol]['last_update'] = price_data['date'].max()
-                    status[symbol]['data_points'] = len(price_data)
+                if symbol in summary.index:
+                    status[symbol]['last_update'] = summary.at[symbol, 'last_update']
+                    status[symbol]['data_points'] = int(summary.at[symbol, 'data_points'])
                     
                     # Get indicator status
                     indicators = self.config_manager.get_technical_indicators()
@@ -223,4 +202,15 @@ class DataPipeline:
             self.logger.error(f"Error getting status: {str(e)}")
             raise
             
-        return status 
\ No newline at end of file
+        return status
+
+    def close(self) -> None:
+        """Close the database connections held by the pipeline."""
+        self.collector.close()
+        self.db_manager.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
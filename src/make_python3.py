@@ -1,28 +1,75 @@
 #!/usr/bin/env python3
 import os
+import shutil
 import stat
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def make_python3_compatible():
-    """Make all Python files in the project compatible with Python 3."""
+SHEBANG = b'#!/usr/bin/env python3'
+
+
+def iter_python_files(directory):
+    """Yield the DirEntry of every .py file under directory, recursively."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_python_files(entry.path)
+            elif entry.name.endswith('.py') and entry.is_file():
+                yield entry
+
+
+def has_shebang(path) -> bool:
+    """Check the first bytes of a file for the python3 shebang."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, len(SHEBANG)) == SHEBANG
+    finally:
+        os.close(fd)
+
+
+def process_file(path: str, mode: int) -> bool:
+    """Add the shebang to one file if missing and make it executable.
+
+    Args:
+        path: Path of the Python file
+        mode: Current st_mode of the file
+
+    Returns:
+        True if the shebang was added
+    """
+    added = not has_shebang(path)
+    if added:
+        # Stream the original behind the shebang into a temporary file and
+        # swap it in, rather than holding the whole file in memory
+        tmp_path = path + '.tmp'
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as out:
+            out.write(SHEBANG + b'\n')
+            shutil.copyfileobj(src, out, 1 << 16)
+        shutil.copystat(path, tmp_path)
+        os.replace(tmp_path, path)
+
+    # Make file executable
+    os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return added
+
+
+def make_python3_compatible(max_workers=None):
+    """Make all Python files in the project compatible with Python 3.
+
+    Files are independent and the work is mostly I/O, so they are processed
+    by a thread pool.
+
+    Args:
+        max_workers: Worker threads; defaults to ThreadPoolExecutor's default
+    """
     project_root = Path(__file__).parent.parent
-    python_files = list(project_root.rglob("*.py"))
-    
-    for py_file in python_files:
-        # Read the file content
-        with open(py_file, 'r') as f:
-            content = f.read()
-        
-        # Add shebang if not present
-        if not content.startswith('#!/usr/bin/env python3'):
-            with open(py_file, 'w') as f:
-                f.write('#!/usr/bin/env python3\n' + content)
-        
-        # Make file executable
-        current_permissions = os.stat(py_file).st_mode
-        os.chmod(py_file, current_permissions | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
-        
-        print(f"Processed: {py_file}")
+    python_files = [(entry.path, entry.stat().st_mode)
+                    for entry in iter_python_files(project_root)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        added = sum(executor.map(lambda job: process_file(*job), python_files))
+
+    print(f"Processed {len(python_files)} files, added shebang to {added}")
 
 if __name__ == '__main__':
-    make_python3_compatible() 
\ No newline at end of file
+    make_python3_compatible()
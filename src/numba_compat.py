@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Optional Numba support
+======================
+
+``njit`` for the compiled kernels in data._kernels and strategy._numba_core.
+It is Numba's decorator when Numba is installed; otherwise it returns the
+function unchanged, so the kernels run as plain Python.
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback no-op decorator used when Numba is not installed."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
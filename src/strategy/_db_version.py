@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Database version stamps
+=======================
+
+Cheap stamps of a SQLite database's on-disk state that the price caches of
+the backtest runners and DatabaseManager are keyed on. In WAL mode a commit only appends to the -wal file
+and the main file changes at checkpoint, so both files are stamped.
+"""
+
+import os
+from typing import Tuple
+
+
+def database_version(db_path: str) -> Tuple[int, ...]:
+    """Stamp that changes whenever a transaction is committed to the database.
+
+    An empty -wal file, as left by a connection that has not written, holds
+    no commits and stamps like a missing one.
+
+    Args:
+        db_path: Path of the SQLite database file
+
+    Returns:
+        Tuple of (mtime_ns, size) of the database file followed by those of
+        its -wal file; zeros for a file that is missing or empty
+    """
+    stamp = ()
+    db_path = os.fspath(db_path)
+    for path in (db_path, db_path + '-wal'):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stamp += (0, 0)
+            continue
+        stamp += (stat.st_mtime_ns, stat.st_size) if stat.st_size else (0, 0)
+    return stamp
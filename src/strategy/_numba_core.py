@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Compiled portfolio simulation kernels
+=====================================
+
+Array-in/array-out kernels used by the vectorized backtest path of
+AdvancedBacktestRunner, decorated with numba_compat.njit.
+"""
+
+import numpy as np
+
+from numba_compat import njit
+
+
+# Columns of the trade log returned by simulate()
+TRADE_BAR, TRADE_ASSET, TRADE_SIDE, TRADE_SHARES, TRADE_PRICE = range(5)
+
+
+@njit(cache=True, nogil=True)
+def _fill(t, i, quantity, price, transaction_cost, cash, shares, entry_price,
+          peak_price, open_pnl, trades, n_trades, trade_pnls, n_closed):
+    """Apply a single fill and append it to the trade log.
+
+    Positive quantities buy, negative quantities sell.
+
+    Returns:
+        Tuple of (cash, n_trades, n_closed) after the fill
+    """
+    notional = quantity * price
+    commission = abs(notional) * transaction_cost
+    cash -= notional + commission
+    open_pnl[i] -= notional + commission
+
+    if quantity > 0:
+        entry_price[i] = (shares[i] * entry_price[i] + notional) / (shares[i] + quantity)
+    shares[i] += quantity
+
+    trades[n_trades, TRADE_BAR] = t
+    trades[n_trades, TRADE_ASSET] = i
+    trades[n_trades, TRADE_SIDE] = 1.0 if quantity > 0 else -1.0
+    trades[n_trades, TRADE_SHARES] = abs(quantity)
+    trades[n_trades, TRADE_PRICE] = price
+    n_trades += 1
+
+    # Position flat again: book the round trip
+    if shares[i] == 0:
+        trade_pnls[n_closed] = open_pnl[i]
+        n_closed += 1
+        open_pnl[i] = 0.0
+        entry_price[i] = 0.0
+        peak_price[i] = 0.0
+
+    return cash, n_trades, n_closed
+
+
+@njit(cache=True, nogil=True)
+def simulate(prices, target_weights, rebalance_mask, transaction_cost,
+             stop_loss_pct, trailing_stop_pct, initial_cash):
+    """Simulate the momentum rotation portfolio bar by bar.
+
+    Orders fill at the close of the bar that generated them. On every bar,
+    held positions are first checked against the stop loss and trailing stop;
+    on rebalance bars, positions outside the target are closed and the rest
+    are moved to their target weight when they are more than 1% away, with
+    all sells placed before any buy.
+
+    The stops follow AdvancedMomentumRotationStrategy: a position's first
+    check after entry only starts its running peak, so the trailing stop can
+    trigger from the following bar on, and the peak is forgotten once the
+    position is closed.
+
+    Args:
+        prices: Close prices of shape (T, N), finite wherever a position can be held
+        target_weights: Target portfolio weights of shape (T, N), read on rebalance bars
+        rebalance_mask: Boolean array of shape (T,) marking rebalance bars
+        transaction_cost: Commission as a fraction of traded value
+        stop_loss_pct: Stop loss threshold relative to entry price (negative)
+        trailing_stop_pct: Trailing stop distance from the running peak (positive)
+        initial_cash: Starting cash
+
+    Returns:
+        Tuple of (equity, cash, trades, trade_pnls): equity and cash are (T,)
+        end-of-bar curves, trades is the fill log with columns TRADE_*, and
+        trade_pnls holds the commission-inclusive P&L of each closed round trip
+    """
+    n_bars, n_assets = prices.shape
+    equity = np.empty(n_bars)
+    cash_curve = np.empty(n_bars)
+    trades = np.empty((2 * n_bars * n_assets, 5))
+    trade_pnls = np.empty(n_bars * n_assets)
+    n_trades = 0
+    n_closed = 0
+
+    cash = initial_cash
+    shares = np.zeros(n_assets)
+    entry_price = np.zeros(n_assets)
+    peak_price = np.zeros(n_assets)
+    open_pnl = np.zeros(n_assets)
+
+    for t in range(n_bars):
+        # Risk controls on every bar
+        for i in range(n_assets):
+            if shares[i] > 0:
+                price = prices[t, i]
+                # A peak of zero means the trailing stop has not started yet
+                tracked = peak_price[i] > 0.0
+                if price > peak_price[i]:
+                    peak_price[i] = price
+                if (price / entry_price[i] - 1.0 <= stop_loss_pct or
+                        (tracked and price / peak_price[i] - 1.0 <= -trailing_stop_pct)):
+                    cash, n_trades, n_closed = _fill(
+                        t, i, -shares[i], price, transaction_cost, cash, shares,
+                        entry_price, peak_price, open_pnl, trades, n_trades,
+                        trade_pnls, n_closed)
+
+        if rebalance_mask[t]:
+            value = cash
+            for i in range(n_assets):
+                if shares[i] > 0:
+                    value += shares[i] * prices[t, i]
+
+            # Close positions that left the target first to free up cash
+            for i in range(n_assets):
+                if shares[i] > 0 and target_weights[t, i] <= 0.0:
+                    cash, n_trades, n_closed = _fill(
+                        t, i, -shares[i], prices[t, i], transaction_cost, cash,
+                        shares, entry_price, peak_price, open_pnl, trades,
+                        n_trades, trade_pnls, n_closed)
+
+            # Then reductions before purchases, so buys can use the freed cash
+            quantities = np.zeros(n_assets)
+            for i in range(n_assets):
+                target = target_weights[t, i]
+                if target <= 0.0:
+                    continue
+                current = shares[i] * prices[t, i] / value
+                if abs(target - current) > 0.01:
+                    quantities[i] = float(int((target - current) * value / prices[t, i]))
+            for buying in (False, True):
+                for i in range(n_assets):
+                    quantity = quantities[i]
+                    if quantity == 0 or (quantity > 0) != buying:
+                        continue
+                    price = prices[t, i]
+                    if buying:
+                        # Never spend more cash than is available
+                        affordable = float(int(cash / (price * (1.0 + transaction_cost))))
+                        quantity = min(quantity, affordable)
+                        if quantity <= 0:
+                            continue
+                    cash, n_trades, n_closed = _fill(
+                        t, i, quantity, price, transaction_cost, cash, shares,
+                        entry_price, peak_price, open_pnl, trades, n_trades,
+                        trade_pnls, n_closed)
+
+        value = cash
+        for i in range(n_assets):
+            if shares[i] > 0:
+                value += shares[i] * prices[t, i]
+        equity[t] = value
+        cash_curve[t] = cash
+
+    return equity, cash_curve, trades[:n_trades], trade_pnls[:n_closed]
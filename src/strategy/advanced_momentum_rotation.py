@@ -11,41 +11,205 @@ A flexible momentum rotation strategy that supports:
 - Risk management controls
 """
 
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import pandas as pd
 import numpy as np
 import sqlite3
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
+from dataclasses import dataclass, fields, asdict
 import logging
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 import backtrader as bt
 import backtrader.analyzers as btanalyzers
 from collections import defaultdict
 
+try:
+    from ._db_version import database_version
+except ImportError:  # run as a script from this directory
+    from _db_version import database_version
 
-class AdvancedMomentumRotationStrategy(bt.Strategy):
-    """Advanced Momentum Rotation Strategy with flexible parameters."""
+
+def align_close_prices(price_data: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray]:
+    """Align per-symbol close prices into a single (T, N) matrix.
+
+    Rows are the union of trading days across symbols (the same clock Backtrader
+    drives the strategy with), columns follow the insertion order of
+    ``price_data``. Gaps are forward-filled per symbol; days before a symbol's
+    first bar stay NaN.
+
+    Returns:
+        Tuple of (dates, prices) where prices is a float64 array of shape (T, N)
+    """
+    closes = pd.concat({symbol: df['close'] for symbol, df in price_data.items()}, axis=1)
+    closes = closes.sort_index().ffill()
+    return closes.index.values, closes.to_numpy(dtype=np.float64)
+
+
+def compute_momentum(log_prices: np.ndarray, lookback_period: int) -> np.ndarray:
+    """Compute lookback-period total return for every day and asset at once.
+
+    Log prices are the running sum of log returns, so the return over any
+    lookback is exp(log P[t] - log P[t - L]) - 1: one subtraction of a shared
+    array per lookback, however many lookbacks a sweep tries.
+
+    Args:
+        log_prices: Natural log of aligned close prices, shape (T, N)
+        lookback_period: Momentum lookback in trading days
+
+    The subtraction runs in float64; the result is stored as float32, which is
+    ample for ranking and thresholding and halves the memory scanned per bar.
+    Portfolio accounting never reads it and stays in float64.
+
+    Returns:
+        float32 array of shape (T, N); the first ``lookback_period`` rows are NaN
+    """
+    momentum = np.full(log_prices.shape, np.nan, dtype=np.float32)
+    if lookback_period < len(log_prices):
+        with np.errstate(invalid='ignore'):
+            momentum[lookback_period:] = np.expm1(log_prices[lookback_period:] - log_prices[:-lookback_period])
+    return momentum
+
+
+def rebalance_periods(dates: np.ndarray, rebalance_freq: str) -> np.ndarray:
+    """Number each bar's calendar rebalance period.
+
+    Periods are calendar days for 'daily', Monday-based weeks for 'weekly'
+    and calendar months for 'monthly'.
+
+    Args:
+        dates: Bar dates as datetime64 values
+        rebalance_freq: 'daily', 'weekly' or 'monthly'
+
+    Returns:
+        Integer period id per bar, non-decreasing for sorted dates
+    """
+    if rebalance_freq == 'monthly':
+        return dates.astype('datetime64[M]').astype(np.int64)
+    
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    if rebalance_freq == 'weekly':
+        # Day 0 (1970-01-01) is a Thursday; shift so weeks start on Monday
+        return (days + 3) // 7
+    return days
+
+
+def rebalance_mask(dates: np.ndarray, rebalance_freq: str) -> np.ndarray:
+    """Mark the first bar of every rebalance period.
+
+    Args:
+        dates: Bar dates as datetime64 values
+        rebalance_freq: 'daily', 'weekly' or 'monthly'
+
+    Returns:
+        Boolean array with one entry per bar; the first bar is always marked
+    """
+    periods = rebalance_periods(dates, rebalance_freq)
+    mask = np.ones(len(periods), dtype=bool)
+    mask[1:] = np.diff(periods) != 0
+    return mask
+
+
+def bar_returns(values: np.ndarray) -> np.ndarray:
+    """Bar-over-bar returns of a value series, NaN for the first bar (like pct_change)."""
+    returns = np.full(len(values), np.nan)
+    returns[1:] = values[1:] / values[:-1] - 1
+    return returns
+
+
+def compute_performance_metrics(values: np.ndarray) -> Dict[str, float]:
+    """Compute summary metrics from a portfolio value history.
+
+    Args:
+        values: Portfolio value per bar, shape (T,) with T >= 1
+
+    Returns:
+        Dictionary with total/annualized return, volatility, Sharpe ratio and
+        maximum drawdown
+    """
+    returns = values[1:] / values[:-1] - 1
+    total_return = (values[-1] / values[0]) - 1
+    annualized_return = (1 + total_return) ** (252 / len(values)) - 1
+    volatility = returns.std(ddof=1) * np.sqrt(252) if len(returns) > 1 else np.nan
+    sharpe_ratio = annualized_return / volatility if volatility > 0 else 0
     
-    params = (
-        # Core strategy parameters
-        ('lookback_period', 20),        # Momentum calculation period
-        ('top_n_holdings', 3),          # Number of top assets to hold
-        ('position_size', 0.95),        # Total position size (0.95 = 95% invested)
-        ('rebalance_freq', 'weekly'),   # Rebalancing frequency: 'daily', 'weekly', 'monthly'
-        ('min_momentum_threshold', 0.0), # Minimum momentum to consider buying
+    # Calculate maximum drawdown
+    cumulative_returns = np.cumprod(1 + returns)
+    drawdown = (cumulative_returns / np.maximum.accumulate(cumulative_returns)) - 1
+    max_drawdown = drawdown.min() if len(drawdown) else np.nan
+    
+    return {
+        'total_return': total_return,
+        'annualized_return': annualized_return,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown
+    }
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    """Validated, immutable parameters of the momentum rotation strategy."""
+    
+    # Core strategy parameters
+    lookback_period: int = 20           # Momentum calculation period
+    top_n_holdings: int = 3             # Number of top assets to hold
+    position_size: float = 0.95         # Total position size (0.95 = 95% invested)
+    rebalance_freq: str = 'weekly'      # Rebalancing frequency: 'daily', 'weekly', 'monthly'
+    min_momentum_threshold: float = 0.0 # Minimum momentum to consider buying
+    
+    # Risk management parameters
+    max_position_size: float = 0.4      # Maximum single position size
+    stop_loss_pct: float = -0.1         # Stop loss percentage (-10%)
+    trailing_stop_pct: float = 0.05     # Trailing stop percentage (5%)
+    
+    # Trading parameters
+    transaction_cost: float = 0.001     # Transaction cost (0.1%)
+    min_cash_buffer: float = 0.05       # Minimum cash buffer (5%)
+    
+    def __post_init__(self):
+        """Validate strategy parameters."""
+        if self.top_n_holdings <= 0:
+            raise ValueError("top_n_holdings must be positive")
+        
+        if not (0 < self.position_size <= 1):
+            raise ValueError("position_size must be between 0 and 1")
         
-        # Risk management parameters
-        ('max_position_size', 0.4),     # Maximum single position size
-        ('stop_loss_pct', -0.1),        # Stop loss percentage (-10%)
-        ('trailing_stop_pct', 0.05),    # Trailing stop percentage (5%)
+        if not (0 < self.max_position_size <= 1):
+            raise ValueError("max_position_size must be between 0 and 1")
         
-        # Trading parameters
-        ('transaction_cost', 0.001),    # Transaction cost (0.1%)
-        ('min_cash_buffer', 0.05),      # Minimum cash buffer (5%)
+        if self.rebalance_freq not in ['daily', 'weekly', 'monthly']:
+            raise ValueError("rebalance_freq must be 'daily', 'weekly', or 'monthly'")
         
+        if self.lookback_period <= 0:
+            raise ValueError("lookback_period must be positive")
+    
+    @classmethod
+    def from_dict(cls, params: Union[Dict, 'StrategyParams']) -> 'StrategyParams':
+        """Build parameters from a plain dict; StrategyParams pass through unchanged.
+
+        Missing keys take their defaults. 'target_symbols' is ignored, as the
+        runner sets the universe itself.
+        """
+        if isinstance(params, cls):
+            return params
+        return cls(**{key: value for key, value in params.items() if key != 'target_symbols'})
+
+
+class AdvancedMomentumRotationStrategy(bt.Strategy):
+    """Advanced Momentum Rotation Strategy with flexible parameters."""
+    
+    # Strategy parameters and defaults come from StrategyParams
+    params = tuple((field.name, field.default) for field in fields(StrategyParams)) + (
         # Asset universe (will be set dynamically)
         ('target_symbols', []),         # List of symbols to rotate among
+        ('momentum_matrix', None),      # Precomputed (T, N) momentum aligned to self.datas
+        ('rebalance_mask', None),       # Precomputed (T,) rebalance bars aligned to self.datas
     )
     
     def __init__(self):
@@ -56,12 +220,41 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
         self.current_positions = {}  # {symbol: position_size}
         self.momentum_scores = {}    # {symbol: momentum_score}
         self.last_rebalance_date = None
-        self.pending_orders = []
+        self._rebalance_due = False
+        self.pending_orders = {}     # {order.ref: order}
         self.stop_losses = {}        # {symbol: stop_loss_price}
-        self.trailing_stops = {}     # {symbol: trailing_stop_price}
         
-        # Performance tracking
-        self.portfolio_values = []
+        # Feeds by name, and each feed's Position; the broker updates those
+        # objects in place, so they are fetched once
+        self._data_by_name = {data._name: data for data in self.datas}
+        self._positions = [self.getposition(data) for data in self.datas]
+        self._position_by_name = {data._name: position
+                                  for data, position in zip(self.datas, self._positions)}
+        
+        # Close prices per feed for the fallback momentum calculation
+        self._close_arrays = [None] * len(self.datas)
+        
+        # Highest close per feed since its trailing stop started; NaN until
+        # then, and reset when a closing sell is placed so a re-entry starts afresh
+        self.trailing_highs = np.full(len(self.datas), np.nan)
+        self._index_by_name = {data._name: i for i, data in enumerate(self.datas)}
+        # Feeds sold by a stop on the current bar; their orders are still
+        # pending when the same bar rebalances
+        self._stopped = set()
+        
+        # Performance tracking; value, cash and date per bar are written into
+        # arrays sized for the longest feed and sliced to the bars seen in stop()
+        n_bars = max([data.buflen() for data in self.datas] + [1])
+        self._values = np.empty(n_bars)
+        self._cash = np.empty(n_bars)
+        self._dates = np.empty(n_bars, dtype='datetime64[D]')
+        self._n_bars = 0
+        
+        # Trade and rebalance logs, one list per field; stop() turns them into
+        # the trade_history and rebalance_history records
+        self._trade_log = {field: [] for field in ('date', 'symbol', 'action', 'shares', 'price')}
+        self._rebalance_log = {field: [] for field in ('date', 'selected_assets',
+                                                       'momentum_scores', 'target_positions')}
         self.trade_history = []
         self.rebalance_history = []
         
@@ -77,31 +270,27 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
     
     def _validate_parameters(self):
         """Validate strategy parameters."""
-        if self.params.top_n_holdings <= 0:
-            raise ValueError("top_n_holdings must be positive")
-        
-        if not (0 < self.params.position_size <= 1):
-            raise ValueError("position_size must be between 0 and 1")
-        
-        if not (0 < self.params.max_position_size <= 1):
-            raise ValueError("max_position_size must be between 0 and 1")
-        
-        if self.params.rebalance_freq not in ['daily', 'weekly', 'monthly']:
-            raise ValueError("rebalance_freq must be 'daily', 'weekly', or 'monthly'")
-        
-        if self.params.lookback_period <= 0:
-            raise ValueError("lookback_period must be positive")
+        StrategyParams(**{field.name: getattr(self.params, field.name)
+                          for field in fields(StrategyParams)})
     
     def next(self):
         """Main strategy logic called on each bar."""
         current_date = self.data0.datetime.date(0)
         
         # Track portfolio value
-        self.portfolio_values.append({
-            'date': current_date,
-            'value': self.broker.getvalue(),
-            'cash': self.broker.getcash()
-        })
+        i = self._n_bars
+        if i == len(self._values):
+            self._values = np.resize(self._values, 2 * i)
+            self._cash = np.resize(self._cash, 2 * i)
+            self._dates = np.resize(self._dates, 2 * i)
+        self._values[i] = self.broker.getvalue()
+        self._cash[i] = self.broker.getcash()
+        self._dates[i] = current_date
+        self._n_bars = i + 1
+        
+        # Note period boundaries even while orders are pending
+        if self.params.rebalance_mask is not None and self.params.rebalance_mask[len(self) - 1]:
+            self._rebalance_due = True
         
         # Check for pending orders
         if self.pending_orders:
@@ -119,22 +308,25 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
         if self.last_rebalance_date is None:
             return True
         
-        days_since_rebalance = (current_date - self.last_rebalance_date).days
-        
-        if self.params.rebalance_freq == 'daily':
-            return days_since_rebalance >= 1
-        elif self.params.rebalance_freq == 'weekly':
-            return days_since_rebalance >= 7
-        elif self.params.rebalance_freq == 'monthly':
-            return days_since_rebalance >= 30
+        if self.params.rebalance_mask is not None:
+            return self._rebalance_due
         
-        return False
+        # Without a precomputed mask, compare calendar periods directly
+        periods = rebalance_periods(
+            np.array([self.last_rebalance_date, current_date], dtype='datetime64[D]'),
+            self.params.rebalance_freq
+        )
+        return periods[1] != periods[0]
     
     def _calculate_momentum_scores(self) -> Dict[str, float]:
         """Calculate momentum scores for all assets."""
+        if self.params.momentum_matrix is not None:
+            return self._lookup_momentum_scores()
+        
         momentum_scores = {}
+        lookback = self.params.lookback_period
         
-        for data in self.datas:
+        for i, data in enumerate(self.datas):
             symbol = data._name
             
             # Skip if symbol not in target list
@@ -142,36 +334,58 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
                 continue
             
             # Check if we have enough data
-            if len(data) < self.params.lookback_period:
+            t = len(data) - 1
+            if t < lookback:
                 continue
             
             # Calculate momentum (total return over lookback period)
-            try:
-                current_price = data.close[0]
-                past_price = data.close[-self.params.lookback_period]
-                momentum = (current_price / past_price) - 1.0
-                
-                # Apply minimum threshold
-                if momentum >= self.params.min_momentum_threshold:
-                    momentum_scores[symbol] = momentum
-                    
-            except (IndexError, ZeroDivisionError):
+            closes = self._close_history(i)
+            current_price, past_price = closes[t], closes[t - lookback]
+            if past_price == 0:
                 continue
+            momentum = float(current_price / past_price) - 1.0
+            
+            # Apply minimum threshold
+            if momentum >= self.params.min_momentum_threshold:
+                momentum_scores[symbol] = momentum
         
         return momentum_scores
     
+    def _close_history(self, i: int) -> np.ndarray:
+        """Closes of feed i loaded so far, as a float64 array indexed by bar.
+        
+        The copy of the line buffer is taken once for preloaded feeds and only
+        refreshed when the buffer has grown since.
+        """
+        buffer = self.datas[i].close.array
+        closes = self._close_arrays[i]
+        if closes is None or len(closes) != len(buffer):
+            closes = self._close_arrays[i] = np.array(buffer, dtype=np.float64)
+        return closes
+    
+    def _lookup_momentum_scores(self) -> Dict[str, float]:
+        """Read momentum scores for the current bar from the precomputed matrix."""
+        # The strategy clock ticks once per row of the aligned matrix (prenext included)
+        row = self.params.momentum_matrix[len(self) - 1]
+        eligible = np.isfinite(row) & (row >= self.params.min_momentum_threshold)
+        
+        return {self.datas[i]._name: float(row[i]) for i in np.flatnonzero(eligible)}
+    
     def _select_top_assets(self, momentum_scores: Dict[str, float]) -> List[str]:
         """Select top N assets based on momentum scores."""
         if not momentum_scores:
             return []
         
-        # Sort by momentum score (descending)
-        sorted_assets = sorted(momentum_scores.items(), key=lambda x: x[1], reverse=True)
+        symbols = list(momentum_scores)
+        scores = np.fromiter(momentum_scores.values(), dtype=np.float64, count=len(symbols))
         
-        # Select top N
-        top_assets = [asset for asset, score in sorted_assets[:self.params.top_n_holdings]]
+        # Partition out the top N, then order only those by score (descending);
+        # sorting the indices first keeps ties in insertion order
+        top_n = min(self.params.top_n_holdings, len(scores))
+        top = np.sort(np.argpartition(-scores, top_n - 1)[:top_n])
+        top = top[np.argsort(-scores[top], kind='stable')]
         
-        return top_assets
+        return [symbols[i] for i in top]
     
     def _calculate_target_positions(self, selected_assets: List[str]) -> Dict[str, float]:
         """Calculate target position sizes for selected assets."""
@@ -212,30 +426,31 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
         
         # Update state
         self.last_rebalance_date = current_date
+        self._rebalance_due = False
         self.current_positions = target_positions.copy()
         
-        # Log rebalancing
-        self.rebalance_history.append({
-            'date': current_date,
-            'selected_assets': selected_assets,
-            'momentum_scores': momentum_scores.copy(),
-            'target_positions': target_positions.copy()
-        })
-        
-        self.logger.info(f"Rebalanced on {current_date}")
-        self.logger.info(f"Selected assets: {selected_assets}")
-        self.logger.info(f"Momentum scores: {momentum_scores}")
+        # Log rebalancing; both dicts are built fresh per rebalance and never
+        # modified afterwards, so they are logged without copying
+        log = self._rebalance_log
+        log['date'].append(current_date)
+        log['selected_assets'].append(selected_assets)
+        log['momentum_scores'].append(momentum_scores)
+        log['target_positions'].append(target_positions)
+        
+        # Arguments are passed lazily so nothing is formatted unless INFO is enabled
+        self.logger.info("Rebalanced on %s", current_date)
+        self.logger.info("Selected assets: %s", selected_assets)
+        self.logger.info("Momentum scores: %s", momentum_scores)
     
     def _execute_trades(self, target_positions: Dict[str, float]):
         """Execute trades to reach target positions."""
         portfolio_value = self.broker.getvalue()
         
-        # Get current positions
+        # Get current positions; a position a stop is closing counts as flat
         current_positions = {}
-        for data in self.datas:
+        for data, position in zip(self.datas, self._positions):
             symbol = data._name
-            position = self.getposition(data)
-            if position.size != 0:
+            if position.size != 0 and symbol not in self._stopped:
                 current_positions[symbol] = position.size * data.close[0] / portfolio_value
         
         # Calculate trades needed
@@ -245,10 +460,10 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
         for symbol, current_weight in current_positions.items():
             if symbol not in target_positions:
                 # Sell entire position
-                data = self.getdatabyname(symbol)
-                position = self.getposition(data)
+                position = self._position_by_name[symbol]
                 if position.size > 0:
                     trades_to_execute.append(('sell', symbol, position.size))
+                    self.trailing_highs[self._index_by_name[symbol]] = np.nan
         
         # Adjust positions for target assets
         for symbol, target_weight in target_positions.items():
@@ -256,8 +471,7 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
             weight_diff = target_weight - current_weight
             
             if abs(weight_diff) > 0.01:  # Only trade if difference > 1%
-                data = self.getdatabyname(symbol)
-                current_price = data.close[0]
+                current_price = self._data_by_name[symbol].close[0]
                 
                 # Calculate shares to trade
                 target_value = target_weight * portfolio_value
@@ -270,62 +484,62 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
                 elif shares_to_trade < 0:
                     trades_to_execute.append(('sell', symbol, abs(shares_to_trade)))
         
+        # Sells first, so the buys after them are covered by the freed cash
+        trades_to_execute.sort(key=lambda trade: trade[0] != 'sell')
+        
         # Execute trades
         for trade_type, symbol, shares in trades_to_execute:
-            data = self.getdatabyname(symbol)
+            data = self._data_by_name[symbol]
             
             if trade_type == 'buy':
                 order = self.buy(data=data, size=shares)
-                self.logger.info(f"BUY {shares} shares of {symbol}")
+                self.logger.info("BUY %s shares of %s", shares, symbol)
             else:
                 order = self.sell(data=data, size=shares)
-                self.logger.info(f"SELL {shares} shares of {symbol}")
+                self.logger.info("SELL %s shares of %s", shares, symbol)
             
             if order:
-                self.pending_orders.append(order)
-                self.trade_history.append({
-                    'date': self.data0.datetime.date(0),
-                    'symbol': symbol,
-                    'action': trade_type,
-                    'shares': shares,
-                    'price': data.close[0]
-                })
+                self.pending_orders[order.ref] = order
+                log = self._trade_log
+                log['date'].append(self.data0.datetime.date(0))
+                log['symbol'].append(symbol)
+                log['action'].append(trade_type)
+                log['shares'].append(shares)
+                log['price'].append(data.close[0])
     
     def _check_risk_controls(self):
         """Check and execute risk control measures."""
-        for data in self.datas:
-            symbol = data._name
-            position = self.getposition(data)
-            
-            if position.size > 0:
-                current_price = data.close[0]
-                entry_price = position.price
-                
-                # Calculate return
-                current_return = (current_price / entry_price) - 1.0
-                
-                # Check stop loss
-                if current_return <= self.params.stop_loss_pct:
-                    order = self.sell(data=data, size=position.size)
-                    if order:
-                        self.pending_orders.append(order)
-                        self.logger.info(f"STOP LOSS triggered for {symbol} at {current_return:.2%}")
-                
-                # Update trailing stop
-                if symbol not in self.trailing_stops:
-                    self.trailing_stops[symbol] = current_price
+        self._stopped.clear()
+        positions = self._positions
+        held = np.flatnonzero(np.array([position.size for position in positions]) > 0)
+        if not len(held):
+            return
+        
+        # Returns since entry and against the trailing high, for held feeds only
+        current_prices = np.array([self.datas[i].close[0] for i in held])
+        entry_prices = np.array([positions[i].price for i in held])
+        current_returns = (current_prices / entry_prices) - 1.0
+        stop_hit = current_returns <= self.params.stop_loss_pct
+        
+        # A feed's first check only starts its trailing stop
+        highs = self.trailing_highs[held]
+        tracked = ~np.isnan(highs)
+        highs = np.where(tracked, np.fmax(highs, current_prices), current_prices)
+        self.trailing_highs[held] = highs
+        trailing_hit = tracked & ((current_prices / highs) - 1.0 <= -self.params.trailing_stop_pct)
+        
+        # One closing sell per feed, even when both stops trigger
+        for k in np.flatnonzero(stop_hit | trailing_hit):
+            data = self.datas[held[k]]
+            order = self.sell(data=data, size=positions[held[k]].size)
+            if order:
+                self.pending_orders[order.ref] = order
+                self._stopped.add(data._name)
+                self.trailing_highs[held[k]] = np.nan
+                if stop_hit[k]:
+                    self.logger.info("STOP LOSS triggered for %s at %.2f%%", data._name, current_returns[k] * 100)
                 else:
-                    # Update trailing stop if price moved favorably
-                    if current_price > self.trailing_stops[symbol]:
-                        self.trailing_stops[symbol] = current_price
-                    
-                    # Check trailing stop
-                    trailing_return = (current_price / self.trailing_stops[symbol]) - 1.0
-                    if trailing_return <= -self.params.trailing_stop_pct:
-                        order = self.sell(data=data, size=position.size)
-                        if order:
-                            self.pending_orders.append(order)
-                            self.logger.info(f"TRAILING STOP triggered for {symbol}")
+                    self.logger.info("TRAILING STOP triggered for %s", data._name)
     
     def notify_order(self, order):
         """Handle order notifications."""
@@ -334,46 +548,43 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
         
         if order.status in [order.Completed]:
             if order.isbuy():
-                self.logger.info(f'BUY EXECUTED: {order.data._name} @ {order.executed.price:.2f}')
+                self.logger.info('BUY EXECUTED: %s @ %.2f', order.data._name, order.executed.price)
             else:
-                self.logger.info(f'SELL EXECUTED: {order.data._name} @ {order.executed.price:.2f}')
+                self.logger.info('SELL EXECUTED: %s @ %.2f', order.data._name, order.executed.price)
         
         elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-            self.logger.warning(f'ORDER FAILED: {order.data._name} - Status: {order.status}')
+            self.logger.warning('ORDER FAILED: %s - Status: %s', order.data._name, order.status)
         
-        # Remove from pending orders
-        if order in self.pending_orders:
-            self.pending_orders.remove(order)
+        # Remove from pending orders; notifications carry copies, matched by ref
+        self.pending_orders.pop(order.ref, None)
     
     def stop(self):
         """Called when strategy execution is complete."""
+        self.trade_history = [dict(zip(self._trade_log, row))
+                              for row in zip(*self._trade_log.values())]
+        self.rebalance_history = [dict(zip(self._rebalance_log, row))
+                                  for row in zip(*self._rebalance_log.values())]
+        
         # Calculate final performance metrics
-        if self.portfolio_values:
-            df_portfolio = pd.DataFrame(self.portfolio_values)
-            df_portfolio.set_index('date', inplace=True)
-            
-            # Calculate returns
-            df_portfolio['returns'] = df_portfolio['value'].pct_change()
-            
-            # Calculate metrics
-            total_return = (df_portfolio['value'].iloc[-1] / df_portfolio['value'].iloc[0]) - 1
-            annualized_return = (1 + total_return) ** (252 / len(df_portfolio)) - 1
-            volatility = df_portfolio['returns'].std() * np.sqrt(252)
-            sharpe_ratio = annualized_return / volatility if volatility > 0 else 0
+        n = self._n_bars
+        if n:
+            values = self._values[:n]
             
-            # Calculate maximum drawdown
-            cumulative_returns = (1 + df_portfolio['returns']).cumprod()
-            running_max = cumulative_returns.expanding().max()
-            drawdown = (cumulative_returns / running_max) - 1
-            max_drawdown = drawdown.min()
+            # Calculate metrics on the value array; the frame is only built for the results
+            metrics = compute_performance_metrics(values)
+            bar_dates = pd.DatetimeIndex(self._dates[:n]).date
+            df_portfolio = pd.DataFrame({'value': values, 'cash': self._cash[:n],
+                                         'returns': bar_returns(values)},
+                                        index=pd.Index(bar_dates, name='date'))
+            total_return = metrics['total_return']
+            annualized_return = metrics['annualized_return']
+            volatility = metrics['volatility']
+            sharpe_ratio = metrics['sharpe_ratio']
+            max_drawdown = metrics['max_drawdown']
             
             # Store results
             self.results = {
-                'total_return': total_return,
-                'annualized_return': annualized_return,
-                'volatility': volatility,
-                'sharpe_ratio': sharpe_ratio,
-                'max_drawdown': max_drawdown,
+                **metrics,
                 'portfolio_values': df_portfolio,
                 'trade_history': self.trade_history,
                 'rebalance_history': self.rebalance_history,
@@ -391,21 +602,59 @@ class AdvancedMomentumRotationStrategy(bt.Strategy):
 class AdvancedBacktestRunner:
     """Advanced backtest runner for the momentum rotation strategy."""
     
-    def __init__(self, db_path: str = "data/akshare/market_data.db"):
-        """Initialize the backtest runner."""
+    # Field layout of the on-disk price cache
+    CACHE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+    
+    # Connections shared by runners on the same database, as
+    # {(pid, thread id, db_path): [connection, runners using it]}; a sqlite
+    # connection must not cross a fork or, by default, a thread
+    _connections = {}
+    
+    def __init__(self,
+                 db_path: str = "data/akshare/market_data.db",
+                 cache_dir: Optional[str] = "~/.xquant_cache"):
+        """Initialize the backtest runner.
+
+        Args:
+            db_path: Path to the SQLite database containing market data
+            cache_dir: Directory for the on-disk price cache, or None to disable it
+        """
         self.logger = logging.getLogger(__name__)
         self.db_path = db_path
         self.conn = None
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self._price_cache = {}  # {(symbols, start, end, price_type): (db_version, price_data, dates, prices, log_prices)}
+        self._momentum_cache = {}  # {(symbols, start, end, price_type, lookback): (log_prices, momentum)}
     
     def _connect_db(self):
-        """Connect to the database."""
-        if not self.conn:
-            self.conn = sqlite3.connect(self.db_path)
+        """Connect to the database.
+
+        Runners on the same database in the same thread share one connection,
+        so the PRAGMAs run once rather than per runner. The connection only
+        reads; the database's journal mode and indexes are left to
+        DatabaseManager.
+        """
+        if self.conn:
+            return
+        self._conn_key = (os.getpid(), threading.get_ident(), self.db_path)
+        shared = self._connections.get(self._conn_key)
+        if shared is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-65536")
+            shared = self._connections[self._conn_key] = [conn, 0]
+        shared[1] += 1
+        self.conn = shared[0]
     
     def _close_db(self):
-        """Close database connection."""
+        """Release the database connection, closing it once no runner uses it."""
         if self.conn:
-            self.conn.close()
+            shared = self._connections.get(self._conn_key)
+            if shared is not None and shared[0] is self.conn:
+                shared[1] -= 1
+                if shared[1] == 0:
+                    del self._connections[self._conn_key]
+                    self.conn.close()
             self.conn = None
     
     def get_available_symbols(self) -> List[str]:
@@ -413,61 +662,253 @@ class AdvancedBacktestRunner:
         self._connect_db()
         query = "SELECT DISTINCT symbol FROM daily_prices ORDER BY symbol"
         df = pd.read_sql_query(query, self.conn)
-        return df['symbol'].tolist()
+        # Symbols are stored with numeric affinity; hand them back as strings
+        return df['symbol'].astype(str).tolist()
     
     def get_price_data(self, 
                       symbols: List[str], 
                       start_date: str, 
                       end_date: str,
                       price_type: str = 'non_restored') -> Dict[str, pd.DataFrame]:
-        """Get price data for specified symbols."""
+        """Get price data for specified symbols.
+
+        All symbols are fetched with a single query and split per symbol
+        afterwards.
+        """
         self._connect_db()
         price_data = {}
         
+        # Join against the requested symbols so every row carries the symbol
+        # string it was asked for (the symbol column has numeric affinity)
+        query = f"""
+        WITH requested(symbol) AS (VALUES {', '.join(['(?)'] * len(symbols))})
+        SELECT requested.symbol AS symbol, date, open, high, low, close, volume
+        FROM daily_prices
+        JOIN requested ON daily_prices.symbol = requested.symbol
+        WHERE price_type = ?
+        AND date BETWEEN ? AND ?
+        ORDER BY date
+        """
+        
+        try:
+            df_all = pd.read_sql_query(query, self.conn,
+                                       params=[*symbols, price_type, start_date, end_date],
+                                       # Stored dates are always this text format, so skip inference
+                                       parse_dates={'date': '%Y-%m-%d %H:%M:%S'})
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            self.logger.error(f"Error loading data for {symbols}: {e}")
+            return price_data
+        
+        groups = dict(tuple(df_all.groupby('symbol', sort=False)))
         for symbol in symbols:
-            query = f"""
-            SELECT date, open, high, low, close, volume
-            FROM daily_prices
-            WHERE symbol = '{symbol}'
-            AND price_type = '{price_type}'
-            AND date BETWEEN '{start_date}' AND '{end_date}'
-            ORDER BY date
-            """
-            
-            try:
-                df = pd.read_sql_query(query, self.conn)
-                if not df.empty:
-                    df['date'] = pd.to_datetime(df['date'])
-                    df.set_index('date', inplace=True)
-                    price_data[symbol] = df
-                    self.logger.info(f"Loaded {len(df)} records for {symbol}")
-                else:
-                    self.logger.warning(f"No data found for {symbol}")
-            except Exception as e:
-                self.logger.error(f"Error loading data for {symbol}: {e}")
+            df = groups.get(symbol)
+            if df is not None:
+                price_data[symbol] = df.drop(columns='symbol').set_index('date')
+                self.logger.info(f"Loaded {len(df)} records for {symbol}")
+            else:
+                self.logger.warning(f"No data found for {symbol}")
+        
+        return price_data
+    
+    def _load_price_matrix(self,
+                           symbols: List[str],
+                           start_date: str,
+                           end_date: str,
+                           price_type: str = 'non_restored') -> Tuple[Dict[str, pd.DataFrame], np.ndarray, np.ndarray, np.ndarray]:
+        """Load price data and the aligned close matrix, memoized per universe and range.
+
+        Parameter sweeps re-run the same universe many times, so the database is
+        only queried on the first call for a given key. The log of the close
+        matrix is cached alongside it, as every momentum lookback derives from it.
+
+        Returns:
+            Tuple of (price_data, dates, prices, log_prices), the first three as
+            produced by get_price_data and align_close_prices
+        """
+        key = (tuple(symbols), start_date, end_date, price_type)
+        # Stamped before any query, so rows committed meanwhile invalidate the entry
+        db_version = database_version(self.db_path)
+        cached = self._price_cache.get(key)
+        if cached is not None and cached[0] != db_version:
+            cached = None
+        if cached is None:
+            price_data = self._read_disk_cache(key, db_version)
+            if price_data is None:
+                price_data = self.get_price_data(symbols, start_date, end_date, price_type)
+                if not price_data:
+                    return price_data, np.array([], dtype='datetime64[ns]'), np.empty((0, 0)), np.empty((0, 0))
+                self._write_disk_cache(key, db_version, price_data)
+            dates, prices = align_close_prices(price_data)
+            with np.errstate(divide='ignore'):
+                log_prices = np.log(prices)
+            cached = self._price_cache[key] = (db_version, price_data, dates, prices, log_prices)
+        return cached[1:]
+    
+    def _load_momentum(self,
+                       symbols: List[str],
+                       start_date: str,
+                       end_date: str,
+                       log_prices: np.ndarray,
+                       lookback_period: int,
+                       price_type: str = 'non_restored') -> np.ndarray:
+        """Momentum matrix for one lookback, memoized like the price matrix.
+
+        A parameter sweep only varies a handful of lookbacks across many
+        combinations of the other parameters, so each lookback's matrix is
+        computed once and shared, read-only, by every run that uses it. An
+        entry is only reused for the log prices it was computed from, so a
+        price matrix reloaded after a database change gets fresh momentum.
+
+        Args:
+            symbols: Symbols the log prices were loaded for
+            start_date: Start date the log prices were loaded for
+            end_date: End date the log prices were loaded for
+            log_prices: Log close matrix from _load_price_matrix
+            lookback_period: Momentum lookback in trading days
+            price_type: Price type the log prices were loaded for
+
+        Returns:
+            Read-only float32 array as produced by compute_momentum
+        """
+        key = (tuple(symbols), start_date, end_date, price_type, lookback_period)
+        cached = self._momentum_cache.get(key)
+        if cached is not None and cached[0] is log_prices:
+            return cached[1]
+        momentum = compute_momentum(log_prices, lookback_period)
+        momentum.flags.writeable = False
+        self._momentum_cache[key] = (log_prices, momentum)
+        return momentum
+    
+    def _disk_cache_path(self, key: Tuple) -> Optional[Path]:
+        """Path of the on-disk cache file for a price cache key."""
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.blake2b(repr(key).encode()).hexdigest()[:16]
+        return self.cache_dir / f"prices_{digest}.npz"
+    
+    def _read_disk_cache(self, key: Tuple, db_version: Tuple[int, ...]) -> Optional[Dict[str, pd.DataFrame]]:
+        """Rebuild per-symbol price frames from the on-disk cache.
+
+        Returns None when there is no cache file or it was written for another
+        database version (see database_version).
+        """
+        path = self._disk_cache_path(key)
+        if path is None or not path.exists():
+            return None
+        
+        try:
+            with np.load(path) as cache:
+                if tuple(cache['db_version'].tolist()) != db_version:
+                    return None
+                symbols = cache['symbols'].tolist()
+                dates = pd.DatetimeIndex(cache['dates'], name='date')
+                ohlcv = cache['ohlcv']
+        except (OSError, KeyError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable price cache {path}: {e}")
+            return None
+        
+        # A symbol has a bar wherever its close is present
+        close = ohlcv[:, :, self.CACHE_FIELDS.index('close')]
+        price_data = {}
+        for j, symbol in enumerate(symbols):
+            rows = ~np.isnan(close[:, j])
+            price_data[symbol] = pd.DataFrame(ohlcv[rows, j, :], index=dates[rows],
+                                              columns=self.CACHE_FIELDS)
         
+        self.logger.info(f"Loaded {len(symbols)} symbols from price cache {path}")
         return price_data
     
+    def _write_disk_cache(self, key: Tuple, db_version: Tuple[int, ...],
+                          price_data: Dict[str, pd.DataFrame]) -> None:
+        """Persist price frames as an aligned (T, N, field) OHLCV cube."""
+        path = self._disk_cache_path(key)
+        if path is None:
+            return
+        
+        frames = pd.concat({symbol: df[self.CACHE_FIELDS] for symbol, df in price_data.items()},
+                           axis=1).sort_index()
+        ohlcv = frames.to_numpy(dtype=np.float64).reshape(
+            len(frames), len(price_data), len(self.CACHE_FIELDS))
+        
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent runners never see a partial file
+            tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+            np.savez(tmp_path,
+                     symbols=np.array(list(price_data)),
+                     dates=frames.index.values,
+                     ohlcv=ohlcv,
+                     db_version=np.array(db_version, dtype=np.int64))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write price cache {path}: {e}")
+    
     def run_backtest(self,
                     symbols: List[str],
                     start_date: str,
                     end_date: str,
-                    strategy_params: Dict,
-                    initial_capital: float = 1000000.0) -> Dict:
-        """Run backtest with specified parameters."""
-        
-        # Get price data
-        price_data = self.get_price_data(symbols, start_date, end_date)
+                    strategy_params: Union[Dict, StrategyParams],
+                    initial_capital: float = 1000000.0,
+                    use_numba: bool = False,
+                    fill_at_close: bool = False) -> Dict:
+        """Run backtest with specified parameters.
+
+        ``strategy_params`` may be a StrategyParams or a plain dict of its
+        fields; dicts are converted (and validated) once up front.
+
+        With ``use_numba`` the portfolio is simulated by the compiled array
+        kernel in ``_numba_core`` instead of Backtrader. Orders then fill at the
+        signal bar's close rather than the next bar's open. ``fill_at_close``
+        makes Backtrader fill at the signal bar's close too, after which both
+        paths trade alike and differ only by rounding and commission timing;
+        see check_engine_agreement.
+        """
+        params = StrategyParams.from_dict(strategy_params)
+        
+        # Get price data (cached across runs with the same universe and range)
+        price_data, dates, prices, log_prices = self._load_price_matrix(symbols, start_date, end_date)
         
         if not price_data:
             raise ValueError("No price data available for the specified symbols and date range")
         
+        # Momentum for every bar and asset in one pass, reused across runs
+        momentum = self._load_momentum(symbols, start_date, end_date, log_prices,
+                                       params.lookback_period)
+        
+        if use_numba:
+            return self._run_vectorized_backtest(list(price_data), dates, prices, momentum,
+                                                 params, initial_capital)
+        
+        self.logger.info(f"Running backtest from {start_date} to {end_date}")
+        self.logger.info(f"Symbols: {symbols}")
+        self.logger.info(f"Strategy parameters: {params}")
+        return self._run_backtrader_backtest(list(price_data), price_data, dates, momentum,
+                                             params, initial_capital, fill_at_close)
+
+    def _run_backtrader_backtest(self,
+                                 symbols: List[str],
+                                 price_data: Dict[str, pd.DataFrame],
+                                 dates: np.ndarray,
+                                 momentum: np.ndarray,
+                                 params: StrategyParams,
+                                 initial_capital: float,
+                                 fill_at_close: bool = False) -> Dict:
+        """Run the backtest with Backtrader on already loaded data.
+
+        ``symbols`` are the strategy's target symbols and should be those with
+        data in ``price_data``. ``dates`` and the rows of ``momentum`` must be
+        the union of the feeds' dates, as produced by align_close_prices for
+        ``price_data``.
+        """
         # Create cerebro engine
         cerebro = bt.Cerebro()
         
         # Add strategy with parameters
-        strategy_params['target_symbols'] = symbols
-        cerebro.addstrategy(AdvancedMomentumRotationStrategy, **strategy_params)
+        cerebro.addstrategy(AdvancedMomentumRotationStrategy,
+                            target_symbols=symbols,
+                            momentum_matrix=momentum,
+                            rebalance_mask=rebalance_mask(dates, params.rebalance_freq),
+                            **asdict(params))
         
         # Add data feeds
         for symbol, data in price_data.items():
@@ -487,8 +928,10 @@ class AdvancedBacktestRunner:
         # Set broker parameters
         cerebro.broker.setcash(initial_capital)
         cerebro.broker.setcommission(
-            commission=strategy_params.get('transaction_cost', 0.001)
+            commission=params.transaction_cost
         )
+        if fill_at_close:
+            cerebro.broker.set_coc(True)
         
         # Add analyzers
         cerebro.addanalyzer(btanalyzers.SharpeRatio, _name='sharpe')
@@ -497,10 +940,6 @@ class AdvancedBacktestRunner:
         cerebro.addanalyzer(btanalyzers.TradeAnalyzer, _name='trades')
         
         # Run backtest
-        self.logger.info(f"Running backtest from {start_date} to {end_date}")
-        self.logger.info(f"Symbols: {symbols}")
-        self.logger.info(f"Strategy parameters: {strategy_params}")
-        
         results = cerebro.run()
         strategy = results[0]
         
@@ -521,11 +960,259 @@ class AdvancedBacktestRunner:
         }
         
         return backtest_results
+
+    def check_engine_agreement(self,
+                               symbols: List[str],
+                               start_date: str,
+                               end_date: str,
+                               strategy_params: Union[Dict, StrategyParams],
+                               initial_capital: float = 1000000.0,
+                               rtol: float = 0.01) -> Dict:
+        """Run the Backtrader and compiled paths with fills at the close and compare them.
+
+        Both paths apply the same rebalancing and stop rules, so with
+        ``fill_at_close`` their final values should differ only by rounding of
+        share counts and the bar on which commission is booked.
+
+        Args:
+            symbols: Symbols to backtest
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            strategy_params: Strategy parameters shared by both runs
+            initial_capital: Starting cash
+            rtol: Largest accepted relative difference of the final values
+
+        Returns:
+            Dictionary with both final values, their relative difference and
+            whether it is within ``rtol``
+        """
+        backtrader_value = self.run_backtest(symbols, start_date, end_date, strategy_params,
+                                             initial_capital, fill_at_close=True)['final_value']
+        numba_value = self.run_backtest(symbols, start_date, end_date, strategy_params,
+                                        initial_capital, use_numba=True)['final_value']
+        difference = numba_value / backtrader_value - 1
+        agree = abs(difference) <= rtol
+        if not agree:
+            self.logger.warning(f"Engines disagree for {symbols}: Backtrader {backtrader_value:,.2f}, "
+                                f"compiled {numba_value:,.2f} ({difference:+.2%})")
+        return {
+            'backtrader_value': backtrader_value,
+            'numba_value': numba_value,
+            'relative_difference': difference,
+            'agree': agree
+        }
+
+    def run_universe_backtests(self,
+                               universes: Dict[str, List[str]],
+                               start_date: str,
+                               end_date: str,
+                               strategy_params: Union[Dict, StrategyParams],
+                               initial_capital: float = 1000000.0,
+                               use_numba: bool = False,
+                               max_workers: Optional[int] = None) -> Dict[str, Dict]:
+        """Backtest several asset universes that share one strategy configuration.
+
+        Prices and momentum are loaded and computed once for the union of all
+        universes, and each universe runs on its columns of the shared
+        matrices, giving the same results as run_backtest per universe.
+        Backtrader runs are Python-bound and run one after another; with
+        ``use_numba`` the compiled simulator, which releases the GIL, runs the
+        universes on threads instead.
+
+        Args:
+            universes: Mapping of universe name to its symbols
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            strategy_params: Strategy parameters shared by all universes
+            initial_capital: Starting cash for each universe
+            use_numba: Simulate with the compiled kernel, as in run_backtest
+            max_workers: Worker threads for ``use_numba``; defaults to
+                ThreadPoolExecutor's default
+
+        Returns:
+            Mapping of universe name to backtest results, in the layout of
+            run_backtest; universes without any price data are left out
+        """
+        params = StrategyParams.from_dict(strategy_params)
+        super_symbols = sorted(set().union(*universes.values()))
+        price_data, dates, prices, log_prices = self._load_price_matrix(super_symbols, start_date, end_date)
+        
+        if not price_data:
+            raise ValueError("No price data available for the specified symbols and date range")
+        
+        momentum = self._load_momentum(super_symbols, start_date, end_date, log_prices,
+                                       params.lookback_period)
+        columns = {symbol: i for i, symbol in enumerate(price_data)}
+        
+        results = {}
+        futures = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for name, symbols in universes.items():
+                available = [symbol for symbol in symbols if symbol in columns]
+                if not available:
+                    self.logger.warning(f"No price data for universe {name}")
+                    continue
+                cols = [columns[symbol] for symbol in available]
+                
+                # The union's rows are this universe's own dates unless another
+                # universe trades on extra days; momentum lookbacks count rows,
+                # so only then is it recomputed on the universe's own rows
+                rows = np.isin(dates, np.unique(np.concatenate(
+                    [price_data[symbol].index.values for symbol in available])))
+                if rows.all():
+                    universe_dates, universe_prices = dates, prices[:, cols]
+                    universe_momentum = momentum[:, cols]
+                else:
+                    universe_dates, universe_prices = dates[rows], prices[rows][:, cols]
+                    universe_momentum = compute_momentum(log_prices[rows][:, cols],
+                                                         params.lookback_period)
+                
+                if use_numba:
+                    futures[name] = executor.submit(self._run_vectorized_backtest, available,
+                                                    universe_dates, universe_prices,
+                                                    universe_momentum, params, initial_capital)
+                else:
+                    results[name] = self._run_backtrader_backtest(
+                        available, {symbol: price_data[symbol] for symbol in available},
+                        universe_dates, universe_momentum, params, initial_capital)
+        results.update((name, future.result()) for name, future in futures.items())
+        return {name: results[name] for name in universes if name in results}
     
-    def generate_performance_report(self, results: Dict, output_dir: str = "results"):
-        """Generate comprehensive performance report."""
-        import os
+    def _run_vectorized_backtest(self,
+                                 symbols: List[str],
+                                 dates: np.ndarray,
+                                 prices: np.ndarray,
+                                 momentum: np.ndarray,
+                                 params: StrategyParams,
+                                 initial_capital: float) -> Dict:
+        """Run the backtest with the compiled simulation kernel.
+
+        Returns a dictionary with the same layout as the Backtrader path.
+        """
+        from ._numba_core import simulate, TRADE_BAR, TRADE_ASSET, TRADE_SIDE, TRADE_SHARES, TRADE_PRICE
+        
+        # Like Backtrader, only start once every symbol has data
+        start = int(np.argmax(np.isfinite(prices).all(axis=1)))
+        dates, prices, momentum = dates[start:], prices[start:], momentum[start:]
+        
+        mask = rebalance_mask(dates, params.rebalance_freq)
+        target_weights = self._target_weights(momentum, mask, params)
+        
+        self.logger.info(f"Running vectorized backtest over {len(dates)} bars")
+        equity, cash, trades, trade_pnls = simulate(
+            np.ascontiguousarray(prices, dtype=np.float64),
+            np.ascontiguousarray(target_weights, dtype=np.float64),
+            mask,
+            float(params.transaction_cost),
+            float(params.stop_loss_pct),
+            float(params.trailing_stop_pct),
+            float(initial_capital)
+        )
+        
+        bar_dates = pd.DatetimeIndex(dates).date
+        df_portfolio = pd.DataFrame({'value': equity, 'cash': cash, 'returns': bar_returns(equity)},
+                                    index=pd.Index(bar_dates, name='date'))
+        metrics = compute_performance_metrics(equity)
+        
+        trade_history = [{
+            'date': bar_dates[int(trade[TRADE_BAR])],
+            'symbol': symbols[int(trade[TRADE_ASSET])],
+            'action': 'buy' if trade[TRADE_SIDE] > 0 else 'sell',
+            'shares': int(trade[TRADE_SHARES]),
+            'price': float(trade[TRADE_PRICE])
+        } for trade in trades]
         
+        rebalance_history = []
+        target_positions = {}
+        for t in np.flatnonzero(mask):
+            row = momentum[t]
+            eligible = np.isfinite(row) & (row >= params.min_momentum_threshold)
+            held = np.flatnonzero(target_weights[t] > 0)
+            held = held[np.argsort(-row[held], kind='stable')]
+            target_positions = {symbols[i]: float(target_weights[t, i]) for i in held}
+            rebalance_history.append({
+                'date': bar_dates[t],
+                'selected_assets': [symbols[i] for i in held],
+                'momentum_scores': {symbols[i]: float(row[i]) for i in np.flatnonzero(eligible)},
+                'target_positions': target_positions.copy()
+            })
+        
+        final_value = float(equity[-1])
+        drawdown = 1.0 - equity / np.maximum.accumulate(equity)
+        n_won = int((trade_pnls >= 0).sum())
+        net_shares = np.bincount(trades[:, TRADE_ASSET].astype(np.int64),
+                                 weights=trades[:, TRADE_SIDE] * trades[:, TRADE_SHARES],
+                                 minlength=len(symbols))
+        n_open = int((net_shares > 0).sum())
+        
+        return {
+            'initial_capital': initial_capital,
+            'final_value': final_value,
+            'total_return': (final_value / initial_capital) - 1,
+            'strategy_results': {
+                **metrics,
+                'portfolio_values': df_portfolio,
+                'trade_history': trade_history,
+                'rebalance_history': rebalance_history,
+                'final_positions': target_positions
+            },
+            # Same keys as the Backtrader analyzers the reports read
+            'analyzers': {
+                'sharpe': {'sharperatio': metrics['sharpe_ratio']},
+                'drawdown': {'max': {'drawdown': float(drawdown.max()) * 100,
+                                     'len': self._longest_drawdown(drawdown)}},
+                'returns': {'rtot': float(np.log(final_value / initial_capital))},
+                'trades': {'total': {'total': n_open + len(trade_pnls), 'closed': len(trade_pnls)},
+                           'won': {'total': n_won},
+                           'lost': {'total': len(trade_pnls) - n_won}}
+            }
+        }
+    
+    @staticmethod
+    def _target_weights(momentum: np.ndarray, mask: np.ndarray, params: StrategyParams) -> np.ndarray:
+        """Compute target weights for every rebalance bar at once.
+
+        Each rebalance row holds the top-N eligible assets at equal weight,
+        capped by max_position_size; all other entries are zero.
+        """
+        target_weights = np.zeros(momentum.shape)
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return target_weights
+        
+        scores = momentum[rows]
+        eligible = np.isfinite(scores) & (scores >= params.min_momentum_threshold)
+        ranked = np.where(eligible, scores, -np.inf)
+        
+        top_n = min(params.top_n_holdings, momentum.shape[1])
+        top = np.argpartition(-ranked, top_n - 1, axis=1)[:, :top_n]
+        selected = np.zeros(scores.shape, dtype=bool)
+        np.put_along_axis(selected, top, True, axis=1)
+        selected &= eligible
+        
+        n_selected = np.maximum(selected.sum(axis=1), 1)
+        weight = np.minimum(params.position_size / n_selected, params.max_position_size)
+        target_weights[rows] = np.where(selected, weight[:, None], 0.0)
+        return target_weights
+    
+    @staticmethod
+    def _longest_drawdown(drawdown: np.ndarray) -> int:
+        """Length in bars of the longest stretch spent below a previous peak."""
+        longest = current = 0
+        for underwater in drawdown > 0:
+            current = current + 1 if underwater else 0
+            longest = max(longest, current)
+        return longest
+    
+    def generate_performance_report(self, results: Dict, output_dir: str = "results",
+                                    text_report: bool = False):
+        """Generate the performance chart, plus the text report when requested.
+
+        Args:
+            results: Results dict returned by run_backtest
+            output_dir: Directory the report files are written to
+            text_report: Also write performance_report.txt
+        """
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
@@ -533,54 +1220,36 @@ class AdvancedBacktestRunner:
         strategy_results = results['strategy_results']
         portfolio_df = strategy_results['portfolio_values']
         
-        # Generate plots
-        self._plot_portfolio_performance(portfolio_df, output_dir)
-        self._plot_drawdown(portfolio_df, output_dir)
+        self._plot_report(portfolio_df, output_dir)
         
-        # Generate text report
-        self._generate_text_report(results, output_dir)
+        if text_report:
+            self._generate_text_report(results, output_dir)
         
         self.logger.info(f"Performance report generated in {output_dir}/")
     
-    def _plot_portfolio_performance(self, portfolio_df: pd.DataFrame, output_dir: str):
-        """Plot portfolio performance."""
-        plt.figure(figsize=(12, 8))
-        
-        plt.subplot(2, 1, 1)
-        plt.plot(portfolio_df.index, portfolio_df['value'])
-        plt.title('Portfolio Value Over Time')
-        plt.ylabel('Portfolio Value')
-        plt.grid(True)
-        
-        plt.subplot(2, 1, 2)
-        plt.plot(portfolio_df.index, portfolio_df['returns'].cumsum())
-        plt.title('Cumulative Returns')
-        plt.ylabel('Cumulative Returns')
-        plt.xlabel('Date')
-        plt.grid(True)
-        
-        plt.tight_layout()
-        plt.savefig(f"{output_dir}/portfolio_performance.png", dpi=300, bbox_inches='tight')
-        plt.show()
-    
-    def _plot_drawdown(self, portfolio_df: pd.DataFrame, output_dir: str):
-        """Plot drawdown analysis."""
-        returns = portfolio_df['returns']
-        cumulative_returns = (1 + returns).cumprod()
-        running_max = cumulative_returns.expanding().max()
-        drawdown = (cumulative_returns / running_max) - 1
-        
-        plt.figure(figsize=(12, 6))
-        plt.fill_between(drawdown.index, drawdown, 0, alpha=0.3, color='red')
-        plt.plot(drawdown.index, drawdown, color='red', linewidth=1)
-        plt.title('Drawdown Analysis')
-        plt.ylabel('Drawdown')
-        plt.xlabel('Date')
-        plt.grid(True)
-        
-        plt.tight_layout()
-        plt.savefig(f"{output_dir}/drawdown_analysis.png", dpi=300, bbox_inches='tight')
-        plt.show()
+    def _plot_report(self, portfolio_df: pd.DataFrame, output_dir: str):
+        """Plot portfolio value and drawdown into a single figure saved as report.png."""
+        value = portfolio_df['value']
+        drawdown = value / value.cummax() - 1
+        
+        # A bare Figure renders with Agg on savefig, without pyplot's global
+        # state or a GUI backend
+        fig = Figure(figsize=(12, 8), constrained_layout=True)
+        axes = fig.subplots(2, 1, sharex=True)
+        
+        axes[0].plot(value.index, value)
+        axes[0].set_title('Portfolio Value Over Time')
+        axes[0].set_ylabel('Portfolio Value')
+        axes[0].grid(True)
+        
+        axes[1].fill_between(drawdown.index, drawdown, 0, alpha=0.3, color='red')
+        axes[1].plot(drawdown.index, drawdown, color='red', linewidth=1)
+        axes[1].set_title('Drawdown Analysis')
+        axes[1].set_ylabel('Drawdown')
+        axes[1].set_xlabel('Date')
+        axes[1].grid(True)
+        
+        fig.savefig(f"{output_dir}/report.png", dpi=100)
     
     def _generate_text_report(self, results: Dict, output_dir: str):
         """Generate text performance report."""
@@ -3,14 +3,121 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import sqlite3
-from typing import List, Dict, Tuple
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
 import logging
 from datetime import datetime
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import backtrader as bt
 import backtrader.analyzers as btanalyzers
 from chinese_calendar import is_workday
 
+from ._db_version import database_version
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine for the price cache)
+except ImportError:
+    pyarrow = None
+
+# A held asset that fell more than this on the decision bar is sold into cash
+EXIT_THRESHOLD = -0.05
+
+
+def performance_metrics(values: np.ndarray) -> Dict[str, float]:
+    """Compute summary metrics from a portfolio value curve.
+
+    Args:
+        values: Portfolio value per bar, shape (T,)
+
+    Returns:
+        Dictionary with total/annualized return, Sharpe ratio, maximum drawdown
+        and volatility
+    """
+    returns = values[1:] / values[:-1] - 1
+    total_return = (values[-1] / values[0]) - 1
+    std = returns.std(ddof=1)
+    return {
+        'total_return': total_return,
+        'annualized_return': (1 + total_return) ** (252/len(values)) - 1,
+        'sharpe_ratio': np.sqrt(252) * returns.mean() / std,
+        'max_drawdown': (values / np.maximum.accumulate(values) - 1).min(),
+        'volatility': std * np.sqrt(252),
+    }
+
+
+def last_trading_day_mask(dates: np.ndarray) -> np.ndarray:
+    """Mark the bars that fall on the last trading day of their week.
+
+    A weekday is the last trading day when none of the remaining weekdays of
+    its week is a working day in the Chinese calendar.
+
+    Args:
+        dates: Bar dates as datetime64 values
+
+    Returns:
+        Boolean array with one entry per bar
+    """
+    days = dates.astype('datetime64[D]')
+    # Day 0 (1970-01-01) is a Thursday; shift so Monday is 0
+    weekday = (days.astype(np.int64) + 3) % 7
+    mask = weekday < 5
+    for offset in range(1, 5):
+        in_week = mask & (weekday + offset < 5)
+        later, inverse = np.unique(days[in_week] + offset, return_inverse=True)
+        workday = np.array([is_workday(day) for day in later.astype(object)], dtype=bool)
+        mask[in_week] &= ~workday[inverse]
+    return mask
+
+
+def rotation_holdings(closes: np.ndarray, decision_mask: np.ndarray,
+                      lookback_period: int) -> np.ndarray:
+    """Replay MomentumRotationStrategy's holding decisions on a close matrix.
+
+    On each decision bar the asset with the highest lookback return becomes
+    the holding; if it is already held and fell below EXIT_THRESHOLD on that
+    bar, the portfolio moves to cash instead.
+
+    Args:
+        closes: Close prices of shape (T, N), NaN where an asset has no bar
+        decision_mask: Boolean array of shape (T,) marking decision bars
+        lookback_period: Momentum lookback in bars
+
+    Returns:
+        Integer array of shape (T,) with the column held after each bar's
+        close, or -1 for cash
+    """
+    n_bars = len(closes)
+    momentum = np.full(closes.shape, np.nan)
+    day_returns = np.full(closes.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if lookback_period < n_bars:
+            momentum[lookback_period:] = closes[lookback_period:] / closes[:-lookback_period] - 1
+        day_returns[1:] = closes[1:] / closes[:-1] - 1
+
+    # Holdings change only on decision bars; fill forward from those
+    decisions = np.flatnonzero(decision_mask & ~np.isnan(momentum).all(axis=1))
+    top = np.nanargmax(momentum[decisions], axis=1) if len(decisions) else decisions
+    # The exit rule depends on the previous holding, so only this short pass
+    # over the decision bars stays sequential
+    held = np.empty(len(decisions), dtype=np.int64)
+    current = -1
+    for k, t in enumerate(decisions):
+        if top[k] != current:
+            current = top[k]
+        elif day_returns[t, current] < EXIT_THRESHOLD:
+            current = -1
+        held[k] = current
+
+    # Index of each bar's latest decision; -1 before the first picks the
+    # trailing cash entry
+    last_decision = np.full(n_bars, -1)
+    last_decision[decisions] = np.arange(len(decisions))
+    last_decision = np.maximum.accumulate(last_decision)
+    return np.append(held, -1)[last_decision]
+
+
 class MomentumRotationStrategy(bt.Strategy):
     """Momentum rotation strategy using Backtrader."""
 
@@ -27,29 +134,71 @@ class MomentumRotationStrategy(bt.Strategy):
         self.days_in_position = 0
         self.last_trading_day = None
 
+        # Portfolio value per bar, summarized in stop()
+        n_bars = max([data.buflen() for data in self.datas] + [1])
+        self._values = np.empty(n_bars)
+        self._dates = np.empty(n_bars, dtype='datetime64[D]')
+        self._n_bars = 0
+
+        # Last-trading-day flag per data0 bar, computed once when the feed is
+        # preloaded; otherwise next() checks the calendar bar by bar
+        dates = self.data0.datetime.array
+        self._last_trading_days = last_trading_day_mask(
+            np.array([bt.num2date(x) for x in dates], dtype='datetime64[D]')
+        ) if len(dates) else None
+
+        # Closes of all feeds as one NaN-padded (S, T) matrix for the momentum ranking
+        self._closes = None
+        self._closes_lengths = None
+
+    def _close_matrix(self) -> np.ndarray:
+        """Closes of every feed loaded so far, one row per feed.
+
+        Built once for preloaded feeds and rebuilt only when a buffer has grown.
+        """
+        lengths = [len(data.close.array) for data in self.datas]
+        if lengths != self._closes_lengths:
+            closes = np.full((len(self.datas), max(lengths)), np.nan)
+            for row, data in zip(closes, self.datas):
+                row[:len(data.close.array)] = data.close.array
+            self._closes, self._closes_lengths = closes, lengths
+        return self._closes
+
     def next(self):
+        i = self._n_bars
+        if i == len(self._values):
+            self._values = np.resize(self._values, 2 * i)
+            self._dates = np.resize(self._dates, 2 * i)
+        self._values[i] = self.broker.getvalue()
+        self._dates[i] = self.data0.datetime.date(0)
+        self._n_bars = i + 1
+
         if self.order:
             return
 
         # Check if it's the last trading day of the week
-        current_date = self.data0.datetime.date(0)
-        if self.is_last_trading_day_of_week(current_date):
-            self.last_trading_day = True
+        bar = len(self.data0) - 1
+        if self._last_trading_days is not None and bar < len(self._last_trading_days):
+            self.last_trading_day = bool(self._last_trading_days[bar])
         else:
-            self.last_trading_day = False
+            current_date = self.data0.datetime.date(0)
+            self.last_trading_day = self.is_last_trading_day_of_week(current_date)
 
         if not self.last_trading_day:
             return
 
-        # Calculate momentum for each asset
-        momentums = {}
-        for data in self.datas:
-            if len(data) > self.params.lookback_period:
-                returns = (data.close[0] / data.close[-self.params.lookback_period]) - 1
-                momentums[data._name] = returns
+        # Calculate momentum for every asset with enough history at once
+        bars = np.array([len(data) - 1 for data in self.datas])
+        eligible = bars >= self.params.lookback_period
+        if not eligible.any():
+            return
+        closes = self._close_matrix()
+        rows = np.arange(len(self.datas))
+        past = np.where(eligible, bars - self.params.lookback_period, bars)
+        momentums = closes[rows, bars] / closes[rows, past] - 1
 
-        # Find the top asset
-        top_asset = max(momentums, key=momentums.get)
+        # Find the top asset; argmax keeps the first of equal scores like max() did
+        top_asset = self.datas[int(np.argmax(np.where(eligible, momentums, -np.inf)))]._name
 
         # Check if the current holding is the top asset
         if self.current_holding != top_asset:
@@ -91,54 +240,51 @@ class MomentumRotationStrategy(bt.Strategy):
             return
 
         if order.status in [order.Completed]:
-            if order.isbuy():
-                self.log(f'BUY {order.data._name} @ {order.executed.price:.2f}')
-            else:
-                self.log(f'SELL {order.data._name} @ {order.executed.price:.2f}')
+            self.log('%s %s @ %.2f', 'BUY' if order.isbuy() else 'SELL',
+                     order.data._name, order.executed.price)
 
         self.order = None
 
     def stop(self):
         """Called when the strategy is done."""
-        # Calculate performance metrics
-        returns = pd.Series(self.broker.getvalue()).pct_change()
-
-        # Calculate metrics
-        total_return = (self.broker.getvalue()[-1] / self.broker.getvalue()[0]) - 1
-        annualized_return = (1 + total_return) ** (252/len(returns)) - 1
-        sharpe_ratio = np.sqrt(252) * returns.mean() / returns.std()
-        max_drawdown = (pd.Series(self.broker.getvalue()) / pd.Series(self.broker.getvalue()).cummax() - 1).min()
-        volatility = returns.std() * np.sqrt(252)
+        # Calculate performance metrics from the recorded values
+        values = self._values[:self._n_bars]
 
         # Store results
         self.results = {
-            'total_return': total_return,
-            'annualized_return': annualized_return,
-            'sharpe_ratio': sharpe_ratio,
-            'max_drawdown': max_drawdown,
-            'volatility': volatility,
-            'portfolio_value': self.broker.getvalue(),
+            **performance_metrics(values),
+            'portfolio_value': values,
             'position_history': self.current_holding,
-            'dates': self.data0.datetime.date(0)
+            'dates': pd.DatetimeIndex(self._dates[:self._n_bars]).date
         }
 
-    def log(self, txt, dt=None):
-        dt = dt or self.data0.datetime.date(0)
-        self.logger.info(f'{dt}: {txt}')
+    def log(self, txt, *args, dt=None):
+        """Log txt, %-formatted with args, under the bar date.
+
+        Nothing is formatted unless INFO is enabled, which keeps fills cheap
+        in quiet parameter sweeps.
+        """
+        if self.logger.isEnabledFor(logging.INFO):
+            dt = dt or self.data0.datetime.date(0)
+            self.logger.info('%s: ' + txt, dt, *args)
 
 class BacktestRunner:
     """Class to run backtests using Backtrader."""
 
-    def __init__(self, db_path: str = "data/akshare/market_data.db"):
+    def __init__(self, db_path: str = "data/akshare/market_data.db",
+                 cache_dir: Optional[str] = "~/.xquant_cache"):
         """Initialize the backtest runner.
 
         Args:
             db_path: Path to the SQLite database containing market data
+            cache_dir: Directory for the Parquet price cache, or None to disable
+                it; the cache is only used when pyarrow is installed
         """
         self.logger = logging.getLogger(__name__)
         self.db_path = db_path
         self.symbols = ['510300', '513100', '511010', '518880']
         self.conn = None
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir and pyarrow else None
 
     def _connect_db(self):
         """Connect to the SQLite database."""
@@ -151,47 +297,127 @@ class BacktestRunner:
             self.conn.close()
             self.conn = None
 
-    def get_price_data(self, start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+    def get_price_data(self, start_date: str, end_date: str,
+                       price_type: Optional[str] = None) -> Dict[str, pd.DataFrame]:
         """Get price data for all symbols.
 
+        The query rows are cached as Parquet keyed by symbols, range, price
+        type and database version, so any commit to the database invalidates them.
+
         Args:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
+            price_type: Price series to load, e.g. 'non_restored'; None loads
+                the rows of every price type
 
         Returns:
             Dictionary mapping symbols to their price data
         """
-        self._connect_db()
         price_data = {}
-
+        key = (tuple(self.symbols), start_date, end_date, price_type)
+        # Stamped before the query, so rows committed meanwhile miss the cache
+        db_version = database_version(self.db_path)
+        df_all = self._read_price_cache(key, db_version)
+        if df_all is None:
+            df_all = self._query_price_data(start_date, end_date, price_type)
+            if df_all is None:
+                return price_data
+            self._write_price_cache(key, db_version, df_all)
+
+        groups = dict(tuple(df_all.groupby('symbol', sort=False, observed=True)))
         for symbol in self.symbols:
-            query = f"""
-            SELECT date, open, high, low, close, volume
-            FROM daily_prices
-            WHERE symbol = '{symbol}'
-            AND date BETWEEN '{start_date}' AND '{end_date}'
-            ORDER BY date
-            """
-            self.logger.info(f"Executing query for {symbol}: {query}")
-            try:
-                df = pd.read_sql_query(query, self.conn)
-                if df.empty:
-                    self.logger.warning(f"No data returned for {symbol} between {start_date} and {end_date}")
-                else:
-                    df['date'] = pd.to_datetime(df['date'])
-                    df.set_index('date', inplace=True)
-                    price_data[symbol] = df
-                    self.logger.info(f"Fetched data for {symbol}: shape {df.shape}")
-            except Exception as e:
-                self.logger.error(f"Error fetching data for {symbol}: {e}")
+            df = groups.get(symbol)
+            if df is None:
+                self.logger.warning(f"No data returned for {symbol} between {start_date} and {end_date}")
+            else:
+                price_data[symbol] = df.drop(columns='symbol').set_index('date')
+                self.logger.info(f"Fetched data for {symbol}: shape {price_data[symbol].shape}")
 
         return price_data
 
+    def _query_price_data(self, start_date: str, end_date: str,
+                          price_type: Optional[str]) -> Optional[pd.DataFrame]:
+        """Query the price rows of all symbols, ordered by date.
+
+        Returns:
+            Long-format DataFrame with a symbol column, or None if the query failed
+        """
+        self._connect_db()
+
+        # One parameterized query for all symbols, split per symbol afterwards.
+        # Joining against the requested symbols gives every row the symbol
+        # string it was asked for (the symbol column has numeric affinity).
+        # Ordering by price_type within a date keeps the row order independent
+        # of which index the planner picks
+        query = f"""
+        WITH requested(symbol) AS (VALUES {', '.join(['(?)'] * len(self.symbols))})
+        SELECT requested.symbol AS symbol, date, open, high, low, close, volume
+        FROM daily_prices
+        JOIN requested ON daily_prices.symbol = requested.symbol
+        WHERE date BETWEEN ? AND ?
+        AND (? IS NULL OR price_type = ?)
+        ORDER BY date, price_type
+        """
+        try:
+            return pd.read_sql_query(query, self.conn,
+                                     params=[*self.symbols, start_date, end_date,
+                                             price_type, price_type],
+                                     # Stored dates are always this text format, so skip inference
+                                     parse_dates={'date': '%Y-%m-%d %H:%M:%S'},
+                                     # A handful of symbols: integer codes to group
+                                     # by, and a dictionary column in the cache
+                                     dtype={'symbol': 'category'})
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            self.logger.error(f"Error fetching data for {self.symbols}: {e}")
+            return None
+
+    def _price_cache_path(self, key: Tuple, db_version: Tuple[int, ...]) -> Optional[Path]:
+        """Path of the Parquet cache file for a price query key and database version."""
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.blake2b(repr(key).encode()).hexdigest()[:16]
+        version = hashlib.blake2b(repr(db_version).encode()).hexdigest()[:8]
+        return self.cache_dir / f"basic_prices_{digest}_{version}.parquet"
+
+    def _read_price_cache(self, key: Tuple, db_version: Tuple[int, ...]) -> Optional[pd.DataFrame]:
+        """Read cached query rows, or None if there are none for this database version."""
+        path = self._price_cache_path(key, db_version)
+        try:
+            if path is None:
+                return None
+            return pd.read_parquet(path)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                self.logger.warning(f"Ignoring unreadable price cache {path}: {e}")
+            return None
+
+    def _write_price_cache(self, key: Tuple, db_version: Tuple[int, ...],
+                           df_all: pd.DataFrame) -> None:
+        """Store query rows so later runs over the same range skip SQLite.
+
+        Files of the same query for older database versions are removed.
+        """
+        path = self._price_cache_path(key, db_version)
+        if path is None or df_all.empty:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            df_all.to_parquet(tmp_path, compression='zstd', index=False)
+            os.replace(tmp_path, path)
+            stem = path.stem.rsplit('_', 1)[0]
+            for stale in path.parent.glob(f"{stem}_*.parquet"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except OSError as e:
+            self.logger.warning(f"Could not write price cache {path}: {e}")
+
     def run_backtest(self,
                     start_date: str,
                     end_date: str,
                     lookback_period: int,
-                    top_n: int) -> Dict:
+                    top_n: int,
+                    plot: bool = True) -> Dict:
         """Run a backtest with the given parameters.
 
         Args:
@@ -199,6 +425,7 @@ class BacktestRunner:
             end_date: End date in YYYY-MM-DD format
             lookback_period: Number of periods to look back for momentum
             top_n: Number of top performing assets to hold
+            plot: Save the value curve to backtest_performance.png
 
         Returns:
             Dictionary containing backtest results
@@ -254,72 +481,135 @@ class BacktestRunner:
             'dates': strategy.results['dates']
         }
 
+        if not plot:
+            return backtest_results
+
         # Plot results
-        plt.figure(figsize=(12, 6))
-        plt.plot(strategy.results['dates'], strategy.results['portfolio_value'])
-        plt.title('Strategy Performance')
-        plt.xlabel('Date')
-        plt.ylabel('Portfolio Value')
-        plt.grid(True)
-        plt.savefig('backtest_performance.png')
-        plt.close()
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
+        ax.plot(strategy.results['dates'], strategy.results['portfolio_value'])
+        ax.set_title('Strategy Performance')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Portfolio Value')
+        ax.grid(True)
+        fig.savefig('backtest_performance.png')
 
         return backtest_results
 
+    def run_vectorized_backtest(self,
+                                start_date: str,
+                                end_date: str,
+                                lookback_period: int,
+                                top_n: int = 1,
+                                initial_capital: float = 1000000.0,
+                                price_type: str = 'non_restored') -> Dict:
+        """Run the rotation as array operations instead of a Backtrader event loop.
+
+        Decision bars, momentum ranking and the resulting holdings are computed
+        for the whole period at once (see rotation_holdings), and the value curve
+        compounds the held asset's close-to-close returns. The portfolio is fully
+        invested at the decision bar's close without costs, so this is meant for
+        fast parameter screening rather than to reproduce Backtrader fills.
+
+        Args:
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            lookback_period: Number of periods to look back for momentum
+            top_n: Kept for signature parity with run_backtest; like the
+                strategy, the single top asset is held
+            initial_capital: Starting portfolio value
+            price_type: Price series to run on
+
+        Returns:
+            Dictionary with the keys of run_backtest
+        """
+        price_data = self.get_price_data(start_date, end_date, price_type)
+        if not price_data:
+            raise ValueError("No price data available for the specified date range")
+
+        closes = pd.concat({symbol: df['close'] for symbol, df in price_data.items()}, axis=1)
+        closes = closes.sort_index()
+        dates = closes.index.values
+        prices = closes.to_numpy(dtype=np.float64)
+        symbols = list(closes.columns)
+
+        holdings = rotation_holdings(prices, last_trading_day_mask(dates), lookback_period)
+
+        # Bar t earns the return of what was held after bar t - 1's close
+        held = holdings[:-1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            asset_returns = prices[1:] / prices[:-1] - 1
+        bar_returns = np.where(held >= 0, asset_returns[np.arange(len(held)), held], 0.0)
+        values = initial_capital * np.concatenate(([1.0], np.cumprod(1 + np.nan_to_num(bar_returns))))
+
+        return {
+            **performance_metrics(values),
+            'portfolio_value': values,
+            'positions': symbols[holdings[-1]] if holdings[-1] >= 0 else None,
+            'dates': pd.DatetimeIndex(dates).date
+        }
+
     def optimize_parameters(self,
                           train_start: str = '2013-01-01',
                           train_end: str = '2022-12-31',
                           lookback_range: List[int] = [5, 10, 20, 60, 120],
-                          top_n_range: List[int] = [1, 2]) -> Tuple[Dict, pd.DataFrame]:
+                          top_n_range: List[int] = [1, 2],
+                          max_workers: Optional[int] = None) -> Tuple[Dict, pd.DataFrame]:
         """Optimize strategy parameters using training data.
 
+        Each parameter combination is an independent backtest, so the grid is
+        spread over worker processes, each with its own runner and connection.
+
         Args:
             train_start: Start date for training
             train_end: End date for training
             lookback_range: List of lookback periods to test
             top_n_range: List of top N values to test
+            max_workers: Worker processes; defaults to one per combination, up to the CPU count
 
         Returns:
             Tuple of (best parameters dictionary, results DataFrame)
         """
         self.logger.info("Starting parameter optimization...")
 
+        grid = [(lookback, top_n) for lookback in lookback_range for top_n in top_n_range]
+        workers = max_workers or min(len(grid), os.cpu_count() or 1)
+        self.logger.info(f"Testing {len(grid)} parameter combinations on {workers} worker(s)")
+        if workers <= 1:
+            grid_results = [self.run_backtest(train_start, train_end, lookback, top_n, plot=False)
+                            for lookback, top_n in grid]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                     initargs=(self.db_path, self.symbols, self.cache_dir)) as executor:
+                grid_results = list(executor.map(_run_sweep_backtest,
+                                                 *zip(*[(train_start, train_end, lookback, top_n)
+                                                        for lookback, top_n in grid])))
+
         best_sharpe = -np.inf
         best_params = None
         results = []
 
-        for lookback in lookback_range:
-            for top_n in top_n_range:
-                self.logger.info(f"Testing parameters: lookback={lookback}, top_n={top_n}")
-
-                # Run backtest
-                backtest_results = self.run_backtest(
-                    train_start,
-                    train_end,
-                    lookback,
-                    top_n
-                )
-
-                # Store results
-                result = {
+        for (lookback, top_n), backtest_results in zip(grid, grid_results):
+            # Store results
+            result = {
+                'lookback_period': lookback,
+                'top_n': top_n,
+                'sharpe_ratio': backtest_results['sharpe_ratio'],
+                'total_return': backtest_results['total_return'],
+                'annualized_return': backtest_results['annualized_return'],
+                'max_drawdown': backtest_results['max_drawdown'],
+                'volatility': backtest_results['volatility']
+            }
+            results.append(result)
+
+            # Update best parameters
+            if backtest_results['sharpe_ratio'] > best_sharpe:
+                best_sharpe = backtest_results['sharpe_ratio']
+                best_params = {
                     'lookback_period': lookback,
                     'top_n': top_n,
-                    'sharpe_ratio': backtest_results['sharpe_ratio'],
-                    'total_return': backtest_results['total_return'],
-                    'annualized_return': backtest_results['annualized_return'],
-                    'max_drawdown': backtest_results['max_drawdown'],
-                    'volatility': backtest_results['volatility']
+                    'metrics': backtest_results
                 }
-                results.append(result)
-
-                # Update best parameters
-                if backtest_results['sharpe_ratio'] > best_sharpe:
-                    best_sharpe = backtest_results['sharpe_ratio']
-                    best_params = {
-                        'lookback_period': lookback,
-                        'top_n': top_n,
-                        'metrics': backtest_results
-                    }
 
         # Convert results to DataFrame
         results_df = pd.DataFrame(results)
@@ -406,4 +696,22 @@ Performance Metrics:
         with open('strategy_report.txt', 'w') as f:
             f.write(report)
 
-        self.logger.info("Strategy report generated: strategy_report.txt")
\ No newline at end of file
+        self.logger.info("Strategy report generated: strategy_report.txt")
+
+
+# Per-process runner for optimize_parameters workers
+_sweep_runner = None
+
+
+def _init_sweep_worker(db_path: str, symbols: List[str], cache_dir: Optional[Path]):
+    """Create the backtest runner owned by a sweep worker process."""
+    global _sweep_runner
+    # Per-fill and per-run INFO logs of every combination are noise in a sweep
+    logging.getLogger(__name__).setLevel(logging.WARNING)
+    _sweep_runner = BacktestRunner(db_path, cache_dir)
+    _sweep_runner.symbols = symbols
+
+
+def _run_sweep_backtest(start_date: str, end_date: str, lookback_period: int, top_n: int) -> Dict:
+    """Run one parameter combination inside a sweep worker process."""
+    return _sweep_runner.run_backtest(start_date, end_date, lookback_period, top_n, plot=False)